@@ -1,10 +1,34 @@
 from durak_actions import Input_actions, Output_actions
+from configurations import LOG_LEVEL
+from cards import (
+    ALL_CARDS_MASK,
+    BEATS,
+    STRENGTH,
+    TUPLE_TO_CARD,
+    mask_to_tuples,
+    tuples_to_mask,
+)
+from defence_solver import cheapest_defence
+from zobrist import observation_hash
+from game_log import INFO
 from abc import ABC, abstractmethod
-from typing import Any, List, Tuple, Dict
+from collections import deque
+from itertools import combinations
+from typing import Any, List, Optional, Tuple, Dict
 from time import time
 
 
 class AbstractBot(ABC):
+    # How many of the received events get_raw_events keeps: None keeps all of them,
+    # 0 keeps none and N keeps the last N.
+    event_retention: Optional[int] = None
+    # The bot's attributes stay on the instance, which the engine keeps for the whole game.
+    # Set to False to round-trip them through the engine's bot state on every call instead,
+    # for engines that don't keep the instance between calls.
+    persist_in_instance: bool = True
+    # Lowest level of the messages log keeps (see game_log.py)
+    log_level: int = LOG_LEVEL
+
     def notify_optional_attack(
         self, attacker_index: int, card_list: List[Tuple[int, int]]
     ):
@@ -50,6 +74,14 @@ class AbstractBot(ABC):
         """Info about a player who won the game."""
         pass
 
+    def notify_batch(self, events: List[Tuple]):
+        """Info about the passive events since the last call, by order, when the engine
+        batches them (see BATCH_PASSIVE_EVENTS). The card tracking and the getters are
+        already up to date with all of them. Calls the notify_* method of every event
+        by default."""
+        for event in events:
+            self.__notify(event)
+
     def game_init(
         self,
         num_of_players: int,
@@ -122,13 +154,194 @@ class AbstractBot(ABC):
         return self.__deck_count
 
     def get_raw_events(self) -> List[Tuple]:
-        """Get all the raw events that the bot has received, by order."""
+        """Get the raw events that the bot has received (see event_retention), by order."""
+        if isinstance(self.__events, deque):
+            return list(self.__events)
         return self.__events
 
-    def log(self, message: str):
-        if isinstance(message, str):
-            ts = time()
-            self.__logs.append(f"[TS:{ts}]Bot {self.__my_index}: {message}")
+    # Card tracking, kept up to date from the events (see __track_played).
+    # The *_mask getters return 52-bit card masks (bit rank * 4 + suit, see cards.py).
+    def get_burned_mask(self) -> int:
+        """Mask of the cards that were burned."""
+        return self.__burned
+
+    def get_known_mask(self, player_index: int) -> int:
+        """Mask of the cards known to be in a player's hand (cards they took and haven't played)."""
+        return self.__known[player_index]
+
+    def get_unseen_mask(self) -> int:
+        """Mask of the cards never seen: still in the deck or in an opponent's hand."""
+        return ALL_CARDS_MASK & ~self.__seen
+
+    def get_burned_cards(self) -> List[Tuple[int, int]]:
+        """Get the cards that were burned."""
+        return mask_to_tuples(self.__burned)
+
+    def get_known_cards(self, player_index: int) -> List[Tuple[int, int]]:
+        """Get the cards known to be in a player's hand."""
+        return mask_to_tuples(self.__known[player_index])
+
+    def get_unseen_cards(self) -> List[Tuple[int, int]]:
+        """Get the cards never seen: still in the deck or in an opponent's hand."""
+        return mask_to_tuples(self.get_unseen_mask())
+
+    # Card strength and legal plays. The tables are indexed by card = rank * 4 + suit.
+    def get_strength_table(self) -> Tuple[int, ...]:
+        """Strength of every card: its rank, plus 13 for trumps."""
+        return STRENGTH[self.__kozar_card[1]]
+
+    def get_can_beat_table(self) -> Tuple[int, ...]:
+        """For every card, the mask of the cards that beat it."""
+        return BEATS[self.__kozar_card[1]]
+
+    def get_card_strength(self, card: Tuple[int, int]) -> int:
+        """Strength of a card: its rank, plus 13 for trumps."""
+        return STRENGTH[self.__kozar_card[1]][TUPLE_TO_CARD[card]]
+
+    def can_beat(self, defending_card: Tuple[int, int], attacking_card: Tuple[int, int]) -> bool:
+        """Whether defending_card beats attacking_card."""
+        beats = BEATS[self.__kozar_card[1]][TUPLE_TO_CARD[attacking_card]]
+        return (beats >> TUPLE_TO_CARD[defending_card]) & 1 == 1
+
+    def legal_first_attacks(self) -> List[List[Tuple[int, int]]]:
+        """Every card list a first attack may play: cards of a single rank that fit the table."""
+        num_of_free_slots = self.__table_attack.count(None)
+        by_rank: Dict[int, List[Tuple[int, int]]] = {}
+        for card in self.__hand:
+            by_rank.setdefault(card[0], []).append(card)
+        return [
+            list(cards)
+            for rank_cards in by_rank.values()
+            for size in range(1, min(len(rank_cards), num_of_free_slots) + 1)
+            for cards in combinations(rank_cards, size)
+        ]
+
+    def legal_add_ons(self) -> List[Tuple[int, int]]:
+        """Cards that may join the current attack (ranks on the table), if there is room."""
+        if None not in self.__table_attack:
+            return []
+        ranks = {card[0] for card in self.__table_attack + self.__table_defence if card is not None}
+        return [card for card in self.__hand if card[0] in ranks]
+
+    def legal_forwards(self) -> List[List[Tuple[int, int]]]:
+        """Every card list that may forward the current attack (none once a card was defended)."""
+        attacks = [card for card in self.__table_attack if card is not None]
+        if not attacks or any(card is not None for card in self.__table_defence):
+            return []
+        num_of_players = len(self.__cards_per_hand)
+        next_player = (self.__my_index + 1) % num_of_players
+        if self.__deck_count == 0:
+            while next_player != self.__my_index and self.__cards_per_hand[next_player] == 0:
+                next_player = (next_player + 1) % num_of_players
+        max_size = self.__cards_per_hand[next_player] - len(attacks)
+        rank_cards = [card for card in self.__hand if card[0] == attacks[0][0]]
+        return [
+            list(cards)
+            for size in range(1, min(len(rank_cards), max_size) + 1)
+            for cards in combinations(rank_cards, size)
+        ]
+
+    def get_cheapest_defence(self) -> Optional[Tuple[List[Tuple[int, int]], List[int]]]:
+        """The cheapest defence of every undefended attacking card (see defence_solver),
+        as returned by defence. None if the hand can't beat them all."""
+        undefended = [
+            index
+            for index, card in enumerate(self.__table_attack)
+            if card is not None and self.__table_defence[index] is None
+        ]
+        cards = cheapest_defence(
+            [TUPLE_TO_CARD[self.__table_attack[index]] for index in undefended],
+            tuples_to_mask(self.__hand),
+            self.__kozar_card[1],
+        )
+        if cards is None:
+            return None
+        return [(card >> 2, card & 3) for card in cards], undefended
+
+    def get_position_hash(self) -> int:
+        """Zobrist hash of what this bot sees of the game (see zobrist.observation_hash),
+        e.g. to key a zobrist.TranspositionTable."""
+        return observation_hash(
+            self.__my_index,
+            tuples_to_mask(self.__hand),
+            [None if card is None else TUPLE_TO_CARD[card] for card in self.__table_attack],
+            [None if card is None else TUPLE_TO_CARD[card] for card in self.__table_defence],
+            self.__attacker,
+            self.__defender,
+            self.__cards_per_hand,
+            self.__deck_count,
+            TUPLE_TO_CARD[self.__kozar_card],
+            self.__burned,
+        )
+
+    def __track_played(self, player_index: int, card_list: List[Tuple[int, int]]):
+        mask = tuples_to_mask(card_list)
+        self.__seen |= mask
+        self.__known[player_index] &= ~mask
+
+    def __track(self, event: Tuple):
+        # Updates the bot's view of the game with a passive event (or GAME_INIT)
+        match event[0]:
+            case (
+                Input_actions.OPTIONAL_ATTACK_PASSIVE
+                | Input_actions.DEFENCE_PASSIVE
+                | Input_actions.FORWARD_PASSIVE
+            ):
+                self.__track_played(event[1], event[2])
+            case Input_actions.FIRST_ATTACK_PASSIVE:
+                self.__attacker = event[1]
+                self.__track_played(event[1], event[2])
+            case Input_actions.TAKE_PASSIVE:
+                self.__known[event[1]] |= tuples_to_mask(event[2])
+            case Input_actions.BURN:
+                burned = tuples_to_mask(event[1])
+                self.__burned |= burned
+                self.__seen |= burned
+            case Input_actions.TO_HAND:
+                self.__seen |= tuples_to_mask(event[1])
+            case Input_actions.GAME_INIT:
+                self.__my_index = event[2]
+                self.__hand = event[3]
+                self.__kozar_card = event[4]
+                self.__attacker = event[5]
+                self.__burned = 0
+                self.__known = [0] * event[1]
+                self.__seen = tuples_to_mask(event[3]) | (1 << TUPLE_TO_CARD[event[4]])
+            case Input_actions.PASS_PASSIVE | Input_actions.WINNER_PASSIVE:
+                pass
+            case _:
+                raise ValueError(f"Unknown action: {event[0]}")
+
+    def __notify(self, event: Tuple):
+        # Calls the notify_* method (or game_init) of a passive event
+        match event[0]:
+            case Input_actions.OPTIONAL_ATTACK_PASSIVE:
+                self.notify_optional_attack(event[1], event[2])
+            case Input_actions.FIRST_ATTACK_PASSIVE:
+                self.notify_first_attack(event[1], event[2])
+            case Input_actions.DEFENCE_PASSIVE:
+                self.notify_defence(event[1], event[2], event[3])
+            case Input_actions.TAKE_PASSIVE:
+                self.notify_take(event[1], event[2])
+            case Input_actions.FORWARD_PASSIVE:
+                self.notify_forward(event[1], event[2])
+            case Input_actions.PASS_PASSIVE:
+                self.notify_pass(event[1])
+            case Input_actions.BURN:
+                self.notify_burn(event[1])
+            case Input_actions.TO_HAND:
+                self.notify_cards_drawn_to_hand(event[1])
+            case Input_actions.GAME_INIT:
+                self.game_init(event[1], event[2], event[3], event[4], event[5], event[6])
+            case Input_actions.WINNER_PASSIVE:
+                self.notify_winner(event[1])
+
+    def log(self, message: str, *args: Any, level: int = INFO):
+        """Logs message % args. The text is only formatted when the log is read, so pass
+        the values as args instead of formatting them into message (and don't change
+        them afterwards)."""
+        if level >= self.log_level and isinstance(message, str):
+            self.__logs.append((time(), self.__my_index, message, args))
 
     # Helpful for logging and debugging
     RANKS = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
@@ -145,11 +358,20 @@ class AbstractBot(ABC):
         deck_count: int,
         state: Dict[str, Any],
     ):
-        self.__dict__.update(state if state is not None else {})
+        if not self.persist_in_instance and state:
+            self.__dict__.update(state)
         if not hasattr(self, "_AbstractBot__events"):
-            self.__events = []
-        self.__events.append(event)
+            if self.event_retention is None or self.event_retention == 0:
+                self.__events = []
+            else:
+                self.__events = deque(maxlen=self.event_retention)
         action = event[0]
+        if action == Input_actions.EVENT_BATCH:
+            events = event[1]
+        else:
+            events = (event,)
+        if self.event_retention != 0:
+            self.__events.extend(events)
         self.__hand = hand
         self.__table_attack = table_attack
         self.__table_defence = table_defence
@@ -177,35 +399,14 @@ class AbstractBot(ABC):
                     ret_dict["action"] = [Output_actions.FORWARD, cards]
                 else:
                     ret_dict["action"] = [Output_actions.DEFEND, cards, indexes]
-            case Input_actions.OPTIONAL_ATTACK_PASSIVE:
-                self.notify_optional_attack(event[1], event[2])
-            case Input_actions.FIRST_ATTACK_PASSIVE:
-                self.__attacker = event[1]
-                self.notify_first_attack(event[1], event[2])
-            case Input_actions.DEFENCE_PASSIVE:
-                self.notify_defence(event[1], event[2], event[3])
-            case Input_actions.TAKE_PASSIVE:
-                self.notify_take(event[1], event[2])
-            case Input_actions.FORWARD_PASSIVE:
-                self.notify_forward(event[1], event[2])
-            case Input_actions.PASS_PASSIVE:
-                self.notify_pass(event[1])
-            case Input_actions.BURN:
-                self.notify_burn(event[1])
-            case Input_actions.TO_HAND:
-                self.notify_cards_drawn_to_hand(event[1])
-            case Input_actions.GAME_INIT:
-                self.__my_index = event[2]
-                self.__hand = event[3]
-                self.__kozar_card = event[4]
-                self.__attacker = event[5]
-                self.game_init(
-                    event[1], event[2], event[3], event[4], event[5], event[6]
-                )
-            case Input_actions.WINNER_PASSIVE:
-                self.notify_winner(event[1])
+            case Input_actions.EVENT_BATCH:
+                for passive_event in events:
+                    self.__track(passive_event)
+                self.notify_batch(list(events))
             case _:
-                raise ValueError(f"Unknown action: {action}")
-        ret_dict["state"] = self.__dict__
+                self.__track(event)
+                self.__notify(event)
+        if not self.persist_in_instance:
+            ret_dict["state"] = self.__dict__
         ret_dict["log"] = self.__logs
         return ret_dict
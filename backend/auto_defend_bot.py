@@ -0,0 +1,37 @@
+from abstract_bot import AbstractBot
+
+
+class AutoDefendBot(AbstractBot):
+    """A reference bot that always defends with the cheapest complete defence
+    (see defence_solver) and only takes when none exists."""
+
+    event_retention = 0
+
+    def first_attack(self):
+        # All the cards of the weakest rank in hand
+        cards = min(
+            self.legal_first_attacks(),
+            key=lambda cards: (self.get_card_strength(cards[0]), -len(cards)),
+        )
+        self.log("Starting attack with %s", cards)
+        return cards
+
+    def optional_attack(self):
+        # Add the weakest matching non-trump card, never a trump
+        cards = [card for card in self.legal_add_ons() if card[1] != self.get_kozar_suit()]
+        if not cards:
+            return []
+        card = min(cards, key=self.get_card_strength)
+        self.log("Joining attack with: %s", card)
+        return [card]
+
+    def defence(self):
+        defence = self.get_cheapest_defence()
+        if defence is None:
+            self.log("No complete defence, taking cards.")
+            return [], []
+        self.log("Defending with %s, %s", defence[0], defence[1])
+        return defence
+
+
+bot: AutoDefendBot = AutoDefendBot()
@@ -0,0 +1,119 @@
+import os
+import sys
+import copy
+import hashlib
+import threading
+import importlib.util, importlib.machinery
+import traceback
+from types import ModuleType
+from typing import Any, Dict, NamedTuple, Optional
+
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+class CachedBot(NamedTuple):
+    mtime_ns: int
+    size: int
+    digest: str  # sha256 of the file content
+    bot: Any  # The bot as loaded from the file, never handed out directly (see load_bot)
+
+
+# Loaded bots by absolute file path
+_bot_cache: Dict[str, CachedBot] = {}
+_bot_cache_lock = threading.Lock()
+
+
+def load_bot_from_file(filepath: str, digest: str):
+    # Ensure backend dir is in sys.path for bot imports
+    if backend_dir not in sys.path:
+        sys.path.insert(0, backend_dir)
+    # Module names include the content hash, so bot files with the same name don't collide
+    module_name = f"{os.path.splitext(os.path.basename(filepath))[0]}_{digest[:12]}"
+    if filepath.endswith(".py"):
+        spec = importlib.util.spec_from_file_location(module_name, filepath)
+    elif filepath.endswith(".pyc"):
+        loader = importlib.machinery.SourcelessFileLoader(module_name, filepath)
+        spec = importlib.util.spec_from_loader(module_name, loader)
+    else:
+        raise ImportError(f"Unsupported file type for bot file: {filepath}")
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Could not load spec for bot file: {filepath}")
+    try:
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+        # Try to get 'bot' instance, else fallback to module
+        bot_instance = getattr(module, "bot", module)
+        return bot_instance
+    except Exception as e:
+        print(f"[ERROR] Failed to load bot from {filepath}: {e}")
+        traceback.print_exc()
+        return None
+
+
+def file_digest(filepath: str) -> str:
+    """sha256 of a bot file, identifying the version of the bot."""
+    with open(filepath, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def get_cached_bot(filepath: str) -> Any:
+    """The bot loaded from filepath, executing the file only if it is new or changed.
+    The returned object is shared; use load_bot for an instance that can play."""
+    if not os.path.exists(filepath):
+        raise FileNotFoundError(f"Bot file not found: {filepath}")
+    filepath = os.path.abspath(filepath)
+    stat = os.stat(filepath)
+    cached = _bot_cache.get(filepath)
+    if cached is not None and (cached.mtime_ns, cached.size) == (stat.st_mtime_ns, stat.st_size):
+        return cached.bot
+    with _bot_cache_lock:
+        digest = file_digest(filepath)
+        cached = _bot_cache.get(filepath)
+        if cached is None or cached.digest != digest:
+            if cached is not None:
+                invalidate_bot(filepath)
+            cached = CachedBot(0, 0, digest, load_bot_from_file(filepath, digest))
+        _bot_cache[filepath] = cached._replace(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+        return cached.bot
+
+
+def invalidate_bot(filepath: str) -> None:
+    """Drops a bot file from the cache (call it when the file is replaced or deleted)."""
+    cached = _bot_cache.pop(os.path.abspath(filepath), None)
+    if cached is not None:
+        module_name = f"{os.path.splitext(os.path.basename(filepath))[0]}_{cached.digest[:12]}"
+        sys.modules.pop(module_name, None)
+
+
+def load_bot(filepath):
+    """A fresh bot instance for one game seat, cloned from the cached bot (see clone_bot
+    for what is and isn't shared between seats)."""
+    return clone_bot(get_cached_bot(filepath))
+
+
+def clone_bot(bot: Any) -> Any:
+    """Returns a fresh bot instance for a new game seat, without re-executing the bot file.
+
+    Only the instance is isolated: its attributes (and whatever they reference) are deep
+    copied. The bot file runs once per process, so its module-level variables, class
+    attributes and anything the module keeps references to are shared by every seat and
+    game of the process. Bots must keep per-game state on the instance. Module-level bots
+    (no 'bot' instance) cannot be cloned and are shared entirely."""
+    if bot is None or isinstance(bot, ModuleType):
+        return bot
+    return copy.deepcopy(bot)
+
+
+def get_bot_name(bot_instance: Any, filepath: str) -> str:
+    # Use bot.name if available, else fallback to .name file, else fallback to filename
+    bot_name: Optional[str] = getattr(bot_instance, "name", None)
+    if not bot_name:
+        name_file = os.path.splitext(filepath)[0] + ".name"
+        if os.path.exists(name_file):
+            with open(name_file, "r", encoding="utf-8") as f:
+                bot_name = f.read().strip()
+    if not bot_name:
+        fname = os.path.basename(filepath)
+        bot_name = fname.split("_", 1)[-1].replace(".pyc", "").replace(".py", "")
+    return bot_name
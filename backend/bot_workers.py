@@ -0,0 +1,151 @@
+# Out-of-process bots.
+# A BotWorker runs one bot seat in a long-lived child process and forwards every call
+# over a pipe. It enforces per-move timeouts (CPU time inside the child, wall-clock time
+# from the parent) from any thread, and kills and restarts the child if it hangs or
+# dies, without taking the engine down. The engine treats it like any other bot.
+
+import multiprocessing
+import signal
+import traceback
+from typing import Any, Optional
+
+from configurations import MAX_WALL_TIME_PER_TURN
+from bot_loader import load_bot, get_bot_name
+from durak_actions import Input_actions
+
+# Spawned (not forked) children, so a worker never inherits the server's threads
+_mp_context = multiprocessing.get_context("spawn")
+
+
+def _raise_timeout_error(*args):
+    raise TimeoutError
+
+
+def _worker_main(conn, filepath: str) -> None:
+    bot = load_bot(filepath)
+    conn.send(("ready", get_bot_name(bot, filepath) if bot is not None else None))
+    can_limit_cpu = hasattr(signal, "setitimer")
+    if can_limit_cpu:
+        signal.signal(signal.SIGPROF, _raise_timeout_error)
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message[0] == "close":
+            return
+        _, args, cpu_timeout = message
+        try:
+            if bot is None:
+                raise ImportError(f"Could not load bot: {filepath}")
+            if can_limit_cpu and cpu_timeout:
+                signal.setitimer(signal.ITIMER_PROF, cpu_timeout)
+            try:
+                reply = ("ok", bot.call(*args))
+            finally:
+                if can_limit_cpu:
+                    signal.setitimer(signal.ITIMER_PROF, 0)
+        except TimeoutError:
+            reply = ("timeout", "CPU time limit exceeded")
+        except BaseException as e:
+            traceback.print_exc()
+            reply = ("err", f"{type(e).__name__}: {e}")
+        try:
+            conn.send(reply)
+        except Exception as e:  # e.g. the returned state can't be pickled
+            conn.send(("err", f"Could not send the bot result: {e}"))
+
+
+class BotWorker:
+    # call_bot leaves the timeouts to the worker instead of using SIGALRM
+    runs_out_of_process = True
+
+    def __init__(self, filepath: str, wall_timeout: float = MAX_WALL_TIME_PER_TURN):
+        self.filepath = filepath
+        self.wall_timeout = wall_timeout
+        self.name: Optional[str] = None
+        self._process = None
+        self._conn = None
+        # The arguments of the GAME_INIT call, replayed into a restarted child
+        self._game_init: Optional[tuple] = None
+
+    def start(self) -> "BotWorker":
+        parent_conn, child_conn = _mp_context.Pipe()
+        self._process = _mp_context.Process(
+            target=_worker_main, args=(child_conn, self.filepath), daemon=True
+        )
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+        try:
+            status, name = self._conn.recv()
+        except EOFError:
+            self.kill()
+            raise RuntimeError(f"Bot worker for {self.filepath} failed to start")
+        if self.name is None:
+            self.name = name
+        return self
+
+    def restart(self) -> None:
+        # The new child has a fresh bot, so it is told about the game again. It misses the
+        # events since GAME_INIT, but gets the current hand and table with every call.
+        self.kill()
+        self.start()
+        if self._game_init is None:
+            return
+        try:
+            self._conn.send(("call", self._game_init, None))
+            if not self._conn.poll(self.wall_timeout):
+                raise TimeoutError(f"GAME_INIT exceeded {self.wall_timeout}s")
+            self._conn.recv()
+        except (OSError, EOFError) as e:  # TimeoutError is an OSError too
+            self.kill()
+            raise RuntimeError(f"Bot {self.name} worker could not be restarted: {e}") from e
+
+    def kill(self) -> None:
+        if self._process is not None:
+            self._process.kill()
+            self._process.join()
+            self._conn.close()
+            self._process = None
+            self._conn = None
+
+    def close(self) -> None:
+        if self._process is None:
+            return
+        try:
+            self._conn.send(("close",))
+            self._process.join(self.wall_timeout)
+        except (OSError, EOFError):
+            pass
+        self.kill()
+
+    def call(self, *args, timeout: Optional[float] = None) -> Any:
+        """Calls bot.call(*args) in the worker. timeout is the CPU time limit of the move.
+        A worker that hung or died is killed, and restarted by the next call."""
+        if self._conn is None or not self._process.is_alive():
+            self.restart()
+        if args and args[0][0] == Input_actions.GAME_INIT:
+            self._game_init = args
+        try:
+            self._conn.send(("call", args, timeout))
+            has_reply = self._conn.poll(self.wall_timeout)
+            if has_reply:
+                status, value = self._conn.recv()
+        except (OSError, EOFError) as e:  # The worker died during the call
+            self.kill()
+            raise RuntimeError(f"Bot {self.name} worker died: {e}")
+        if not has_reply:
+            self.kill()
+            raise TimeoutError(f"Bot {self.name} exceeded {self.wall_timeout}s")
+        if status == "ok":
+            return value
+        if status == "timeout":
+            raise TimeoutError(value)
+        raise RuntimeError(value)
+
+    def __del__(self):
+        try:
+            self.kill()
+        except Exception:
+            pass
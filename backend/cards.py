@@ -0,0 +1,92 @@
+from configurations import RANKS, SUITS
+from typing import List, Optional, Tuple, Dict, Iterable
+
+# Internal card representation used by the engine.
+# A card is an integer 0..51 encoded as rank * 4 + suit, so rank == card >> 2 and
+# suit == card & 3. A set of cards (e.g. a hand) is a 52-bit mask where bit `card`
+# is set iff the card is in the set. The (rank, suit) tuples and the "7♠" strings
+# are only used at the API boundary (bots and the JSON state).
+assert len(SUITS) == 4, "card encoding assumes 4 suits"
+
+NUM_OF_CARDS: int = len(RANKS) * len(SUITS)
+ALL_CARDS_MASK: int = (1 << NUM_OF_CARDS) - 1
+
+CARD_TUPLES: List[Tuple[int, int]] = [(card >> 2, card & 3) for card in range(NUM_OF_CARDS)]
+CARD_STRS: List[str] = [f"{RANKS[rank]}{SUITS[suit]}" for rank, suit in CARD_TUPLES]
+TUPLE_TO_CARD: Dict[Tuple[int, int], int] = {t: card for card, t in enumerate(CARD_TUPLES)}
+STR_TO_CARD: Dict[str, int] = {s: card for card, s in enumerate(CARD_STRS)}
+
+# RANK_MASKS[rank]: all four cards of that rank.
+RANK_MASKS: List[int] = [0b1111 << (4 * rank) for rank in range(len(RANKS))]
+# SUIT_MASKS[suit]: all thirteen cards of that suit.
+SUIT_MASKS: List[int] = [
+    sum(1 << (rank * 4 + suit) for rank in range(len(RANKS))) for suit in range(len(SUITS))
+]
+
+
+def _beating_mask(card: int, kozar_suit: int) -> int:
+    rank, suit = card >> 2, card & 3
+    mask = 0
+    for higher_rank in range(rank + 1, len(RANKS)):
+        mask |= 1 << (higher_rank * 4 + suit)
+    if suit != kozar_suit:
+        mask |= SUIT_MASKS[kozar_suit]
+    return mask
+
+
+# BEATS[kozar_suit][card]: mask of all cards that can defend against `card`.
+# The tables are tuples since bots get them directly (see AbstractBot.get_can_beat_table).
+BEATS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(_beating_mask(card, kozar_suit) for card in range(NUM_OF_CARDS))
+    for kozar_suit in range(len(SUITS))
+)
+
+
+# STRENGTH[kozar_suit][card]: the rank, with trumps above every other card.
+STRENGTH: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple((card >> 2) + (len(RANKS) if card & 3 == kozar_suit else 0) for card in range(NUM_OF_CARDS))
+    for kozar_suit in range(len(SUITS))
+)
+
+
+def cards_to_mask(cards: Iterable[int]) -> int:
+    mask = 0
+    for card in cards:
+        mask |= 1 << card
+    return mask
+
+
+def mask_to_cards(mask: int) -> List[int]:
+    cards = []
+    while mask:
+        low_bit = mask & -mask
+        cards.append(low_bit.bit_length() - 1)
+        mask ^= low_bit
+    return cards
+
+
+def cards_to_strs(cards: Iterable[Optional[int]]) -> List[str]:
+    return ["" if card is None else CARD_STRS[card] for card in cards]
+
+
+def strs_to_cards(card_strs: Iterable[str]) -> List[Optional[int]]:
+    return [STR_TO_CARD[s] if s else None for s in card_strs]
+
+
+def cards_to_tuples(cards: Iterable[Optional[int]]) -> List[Optional[Tuple[int, int]]]:
+    return [None if card is None else CARD_TUPLES[card] for card in cards]
+
+
+def mask_to_tuples(mask: int) -> List[Tuple[int, int]]:
+    return [CARD_TUPLES[card] for card in mask_to_cards(mask)]
+
+
+def tuples_to_cards(card_tuples: Iterable[Tuple[int, int]]) -> List[int]:
+    return [TUPLE_TO_CARD[t] for t in card_tuples]
+
+
+def tuples_to_mask(card_tuples: Iterable[Tuple[int, int]]) -> int:
+    mask = 0
+    for t in card_tuples:
+        mask |= 1 << TUPLE_TO_CARD[t]
+    return mask
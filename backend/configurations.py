@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 CARDS_PER_HAND: int = 6
 STARTING_MAX_ATTACK_SIZE: int = 5
 MAX_ATTACK_SIZE_AFTER_BURN: int = 6
@@ -6,4 +6,27 @@ MAX_TIME_PER_TURN: float = 0.01
 RANKS: List[str] = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
 SUITS: List[str] = ["♣", "♦", "♥", "♠"]
 USE_TIMING: bool = False
-USE_FIXED_DECK: bool = False
\ No newline at end of file
+FIXED_SEED: Optional[int] = None  # If set, every game is dealt and played with this seed
+MAX_NUM_OF_STEPS: int = 700  # Limit to prevent infinite loops
+TOURNAMENT_WORKERS: int = 0  # Processes used by /api/tournament, 0 means one per core
+TOURNAMENT_CHUNK_SIZE: int = 4  # Max games a tournament worker plays per task, so progress and cancelling are timely
+USE_BOT_WORKERS: bool = False  # Run each bot seat of API games in its own process (see bot_workers.py)
+MAX_WALL_TIME_PER_TURN: float = 1.0  # Wall-clock limit of a move for bots running in a BotWorker
+GAME_STORE_MAX_GAMES: int = 1000  # Games kept in memory by the API
+GAME_STORE_MAX_BYTES: int = 512 * 1024 * 1024  # Approximate memory limit of the kept games
+GAME_STORE_TTL: float = 6 * 60 * 60  # Seconds a game may stay idle before it is evicted
+GAME_STORE_SPILL_DIR: Optional[str] = None  # If set, finished games are saved there on eviction
+DATABASE_PATH: Optional[str] = "durak.db"  # SQLite file for games and tournaments (relative to backend/), None disables it
+DB_BATCH_SIZE: int = 500  # Max queued writes committed in a single transaction
+DB_FLUSH_INTERVAL: float = 1.0  # Seconds the DB writer waits to fill a batch
+REPLAY_CHECKPOINT_INTERVAL: int = 50  # Steps between the state checkpoints of a game record (see replay.py)
+CYCLE_MAX_REPEATS: int = 3  # A game ends as a draw when a position repeats this often without progress (0 disables)
+MAX_STEPS_WITHOUT_PROGRESS: int = 200  # Steps with an empty deck and no burn or winner before a game ends as a draw (0 disables)
+BATCH_PASSIVE_EVENTS: bool = False  # Queue passive events per bot and deliver them in one EVENT_BATCH call before its next move (or at game end)
+LOG_LEVEL: int = 10  # Lowest level of the game and bot log records that are kept: 10 debug, 20 info, 30 warning, 100 off (see game_log.py)
+TOURNAMENT_LOG_LEVEL: int = 100  # Log level of the headless games of tournaments (see runner.py)
+LOG_BUFFER_SIZE: int = 200  # Log records of each bot kept in memory and sent with the game state (see game_log.BotLog)
+LOG_PAGE_SIZE: int = 500  # Max log records returned by a single /api/games/{id}/logs request
+BOT_STATE_DEBUG_MAX_BYTES: int = 64 * 1024  # Max size of a bot state shown by /api/games/{id}/bot_states
+TOURNAMENT_JOBS_MAX_FINISHED: int = 100  # Finished tournament jobs the API keeps for /api/tournaments/{id}
+TOURNAMENT_JOB_TTL: float = 60 * 60  # Seconds a finished tournament job is kept
\ No newline at end of file
@@ -0,0 +1,91 @@
+# Cheapest complete defence.
+# Assigning a distinct hand card to every attacking card it beats is a min-cost bipartite
+# matching (attacks x hand cards over the BEATS relation), solved here with the Hungarian
+# algorithm. With at most 6 attacks it takes microseconds, and unlike a greedy first-fit
+# it always finds a full defence when one exists.
+
+from typing import List, Optional, Sequence
+
+from cards import BEATS, STRENGTH, mask_to_cards
+
+_NO_EDGE = 1 << 30  # Cost of a pair where the hand card doesn't beat the attack
+
+
+def _min_cost_assignment(cost: List[List[int]]) -> List[int]:
+    # Hungarian algorithm for n rows <= m columns, returns the column of every row
+    n, m = len(cost), len(cost[0])
+    u = [0] * (n + 1)
+    v = [0] * (m + 1)
+    p = [0] * (m + 1)  # p[j]: row matched to column j (1-based, 0 for none)
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [_NO_EDGE * 2] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            delta = _NO_EDGE * 2
+            j1 = 0
+            row = cost[i0 - 1]
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = row[j - 1] - u[i0] - v[j]
+                    if cur < minv[j]:
+                        minv[j] = cur
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    columns = [0] * n
+    for j in range(1, m + 1):
+        if p[j]:
+            columns[p[j] - 1] = j - 1
+    return columns
+
+
+def cheapest_defence(
+    attacking_cards: List[int],
+    hand: int,
+    kozar_suit: int,
+    cost: Optional[Sequence[int]] = None,
+) -> Optional[List[int]]:
+    """The hand cards that beat every attacking card (in the same order) at the lowest
+    total cost, or None if the hand can't beat them all. cost[card] defaults to the
+    card strength, so trumps are only spent when needed."""
+    if not attacking_cards:
+        return []
+    beats = BEATS[kozar_suit]
+    if cost is None:
+        cost = STRENGTH[kozar_suit]
+    useful = 0
+    for attacking_card in attacking_cards:
+        options = hand & beats[attacking_card]
+        if not options:
+            return None
+        useful |= options
+    candidates = mask_to_cards(useful)
+    if len(candidates) < len(attacking_cards):
+        return None
+    matrix = [
+        [cost[card] if (beats[attacking_card] >> card) & 1 else _NO_EDGE for card in candidates]
+        for attacking_card in attacking_cards
+    ]
+    columns = _min_cost_assignment(matrix)
+    if any(matrix[row][column] == _NO_EDGE for row, column in enumerate(columns)):
+        return None
+    return [candidates[column] for column in columns]
@@ -16,6 +16,7 @@ class Input_actions(Enum):
     FORWARD_PASSIVE = 14  # the defender forwarded the attack. Format: (FORWARD_PASSIVE, forwarder_index, card_list)
     PASS_PASSIVE = 15  # A player passed (as an optional attacker he chose not to attack). Format: (PASS_PASSIVE, passer_index)
     WINNER_PASSIVE = 16  # info about a player who won the game. Format: (WINNER_PASSIVE, winner_index)
+    EVENT_BATCH = 17  # the passive events above since your last call, by order. Format: (EVENT_BATCH, events)
 
 
 class Output_actions(Enum):
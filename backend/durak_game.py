@@ -1,10 +1,30 @@
 from durak_actions import Output_actions, Input_actions
 from configurations import *
-from random import shuffle, choice
-from typing import List, Tuple, Optional, Any, Dict
+from cards import (
+    NUM_OF_CARDS,
+    ALL_CARDS_MASK,
+    CARD_TUPLES,
+    CARD_STRS,
+    STR_TO_CARD,
+    RANK_MASKS,
+    SUIT_MASKS,
+    BEATS,
+    cards_to_mask,
+    mask_to_cards,
+    mask_to_tuples,
+    cards_to_strs,
+    strs_to_cards,
+    cards_to_tuples,
+    tuples_to_cards,
+)
+from zobrist import compute_hash, hash_snapshot, update_hash
+from game_log import ENGINE_SOURCE, LOG_EVENT_LEVELS, LOG_OFF, BotLog, LogEvent, format_log
+from random import Random, shuffle
+from typing import List, Tuple, Optional, Any, Dict, NamedTuple
 from inspect import currentframe
 from time import time
 import signal
+import threading
 
 
 def pretty_print_state(state):
@@ -27,31 +47,12 @@ def pretty_print_state(state):
     print(f"Deck Count: {state['deck_count']}")
 
 
-def card_str_to_tuple(card_str: Optional[str]) -> Optional[Tuple[int, int]]:
-    if not card_str:
-        return None
-    if len(card_str) == 3:
-        rank = "10"
-        suit = card_str[2]
-    else:
-        rank = card_str[0]
-        suit = card_str[1]
-    return (RANKS.index(rank), SUITS.index(suit))
-
-
-def __call_bot_subprocess(q, bot, args, kwargs):
-    f = open("file.txt", "w")
-    f.write("Subprocess started\n")
-    f.close()
-    try:
-        result = bot.call(*args, **kwargs)
-        q.put(("ok", result))
-    except Exception as e:
-        q.put(("err", e))
-
-
 def call_bot(bot, *args, timeout: float = MAX_TIME_PER_TURN, **kwargs):
-    if not USE_TIMING:
+    if getattr(bot, "runs_out_of_process", False):
+        # Bot workers enforce the time limits themselves, from any thread
+        return bot.call(*args, timeout=timeout if USE_TIMING else None, **kwargs)
+    # SIGALRM can only be used from the main thread, other threads need USE_BOT_WORKERS
+    if not USE_TIMING or threading.current_thread() is not threading.main_thread():
         return bot.call(*args, **kwargs)
 
     def raise_timeout_error(*args):
@@ -77,34 +78,25 @@ def inform(player_bot: Any, message: Any, params: Tuple, state: Any) -> Any:
 
 
 def inform_all(
+    game: "DurakState",
     bots: List[Any],
     index_list: List[int],
     message: Any,
-    params_list: List[Tuple],
-    states: List[Any],
-    log: List[List[str]],
+    observation: "Observation",
 ) -> None:
-    for bot_index, params in zip(index_list, params_list):
-        result = inform(bots[bot_index], message, params, states[bot_index])
-        if isinstance(result, dict):
-            if "state" in result:
-                states[bot_index] = result["state"]
-            if "log" in result and isinstance(result["log"], list):
-                log[bot_index].extend(result["log"])
-
-
-def card_tuple_to_str(card_tuple: Optional[Tuple[int, int]]) -> str:
-    if card_tuple is None:
-        return ""
-    return f"{RANKS[card_tuple[0]]}{SUITS[card_tuple[1]]}"
-
-
-def card_list_strs_to_tuples(hand: List[str]) -> List[Optional[Tuple[int, int]]]:
-    return [card_str_to_tuple(c) for c in hand]
+    for bot_index in index_list:
+        result = inform(
+            bots[bot_index], message, observation.params(bot_index), game.bot_states[bot_index]
+        )
+        apply_inform_result(game, bot_index, result)
 
 
-def card_list_tuples_to_strs(hand: List[Optional[Tuple[int, int]]]) -> List[str]:
-    return [card_tuple_to_str(c) for c in hand]
+def apply_inform_result(game: "DurakState", bot_index: int, result: Any) -> None:
+    if isinstance(result, dict):
+        if "state" in result:
+            game.bot_states[bot_index] = result["state"]
+        if "log" in result and isinstance(result["log"], list):
+            add_logs(game, bot_index, result["log"])
 
 
 def valid_card_format(card: Any) -> bool:
@@ -164,562 +156,889 @@ def valid_action_format(action: Any) -> bool:
     return False
 
 
-def init_deck() -> List[Tuple[int, int]]:
-    deck = list()
-    for i in range(13):
-        for j in range(4):
-            deck.append((i, j))
-    shuffle(deck)
+def init_deck(rng: Optional[Random] = None) -> List[int]:
+    deck = list(range(NUM_OF_CARDS))
+    if rng is None:
+        shuffle(deck)
+    else:
+        rng.shuffle(deck)
     return deck
 
 
-def real_cards(card_list: List[Optional[Tuple[int, int]]]) -> List[Tuple[int, int]]:
+def real_cards(card_list: List[Optional[int]]) -> List[int]:
     return [card for card in card_list if card is not None]
 
 
-def attack_vector(
-    attack: List[Optional[Tuple[int, int]]], defence: List[Optional[Tuple[int, int]]]
-) -> set:
-    if attack[0] is None:  # New attack
-        return set(range(13))
-    return set(card[0] for card in attack + defence if card is not None)
+# Returns the mask of all the cards that may join the attack.
+def attack_vector(attack: List[Optional[int]], defence: List[Optional[int]]) -> int:
+    if not attack or attack[0] is None:  # New attack
+        return ALL_CARDS_MASK
+    mask = 0
+    for card in attack:
+        if card is not None:
+            mask |= RANK_MASKS[card >> 2]
+    for card in defence:
+        if card is not None:
+            mask |= RANK_MASKS[card >> 2]
+    return mask
 
 
 def valid_to_attack(
-    attacking_card: Tuple[int, int],
-    attack: List[Optional[Tuple[int, int]]],
-    defence: List[Optional[Tuple[int, int]]],
+    attacking_card: int,
+    attack: List[Optional[int]],
+    defence: List[Optional[int]],
 ) -> bool:
-    return attacking_card[0] in attack_vector(attack, defence)
+    return (attack_vector(attack, defence) >> attacking_card) & 1 == 1
 
 
-def valid_to_defend(
-    defending_card: Tuple[int, int], attacking_card: Tuple[int, int], kozar_suit: int
-) -> bool:
-    if defending_card[1] == attacking_card[1] and defending_card[0] > attacking_card[0]:
-        return True
-    if defending_card[1] == kozar_suit and attacking_card[1] != kozar_suit:
-        return True
-    return False
+def valid_to_defend(defending_card: int, attacking_card: int, kozar_suit: int) -> bool:
+    return (BEATS[kozar_suit][attacking_card] >> defending_card) & 1 == 1
 
 
 def defend_with_one_card(
     index: int,  # Index in the defence table
-    attack: List[Optional[Tuple[int, int]]],  # Current attack vector
-    defence: List[Optional[Tuple[int, int]]],  # Current defence vector
-    defending_card: Tuple[int, int],  # Card to defend with
-    defending_hand: List[Tuple[int, int]],  # Hand of the defending player
+    attack: List[Optional[int]],  # Current attack vector
+    defence: List[Optional[int]],  # Current defence vector
+    defending_card: int,  # Card to defend with
+    defending_hand: int,  # Hand mask of the defending player
     kozar_suit: int,  # Suit of the kozar card (trump suit)
-) -> int:
+) -> bool:
     if not isinstance(index, int):
-        return 0
-    if defending_card not in defending_hand:
-        return 0
+        return False
+    if not (defending_hand >> defending_card) & 1:
+        return False
     if (
         index >= len(defence)
         or index < 0
-        or defence[index] != None
-        or attack[index] == None
+        or defence[index] is not None
+        or attack[index] is None
     ):
-        return 0
+        return False
     if not valid_to_defend(defending_card, attack[index], kozar_suit):
-        return 0
+        return False
 
-    defending_hand.remove(defending_card)
     defence[index] = defending_card
-    return 1
+    return True
 
 
 # assuming the parameters passed the valid_action_format check
 def defend_with_card_list(
     index_list: List[int],  # Indices in the defence table
-    defending_card_list: List[Tuple[int, int]],  # Card list to defend with
-    attack: List[Optional[Tuple[int, int]]],  # Current attack vector
-    defence: List[Optional[Tuple[int, int]]],  # Current defence vector
-    defending_hand: List[Tuple[int, int]],  # Hand of the defending player
+    defending_card_list: List[int],  # Card list to defend with
+    attack: List[Optional[int]],  # Current attack vector
+    defence: List[Optional[int]],  # Current defence vector
+    defending_hand: int,  # Hand mask of the defending player
     kozar_suit: int,  # Suit of the kozar card (trump suit)
-) -> List[Tuple[int, int]]:
+) -> Tuple[List[int], List[int], int]:
     successful_defending_cards = []
     successful_index_list = []
     for index, card in zip(index_list, defending_card_list):
         if defend_with_one_card(
             index, attack, defence, card, defending_hand, kozar_suit
         ):
+            defending_hand &= ~(1 << card)
             successful_defending_cards.append(card)
             successful_index_list.append(index)
-    return successful_defending_cards, successful_index_list
+    return successful_defending_cards, successful_index_list, defending_hand
 
 
 def forward_with_card_list(
-    forwarding_card_list: List[Tuple[int, int]],
-    attack: List[Optional[Tuple[int, int]]],
-    forwarding_hand: List[Tuple[int, int]],
+    forwarding_card_list: List[int],
+    attack: List[Optional[int]],
+    forwarding_hand: int,
     num_of_allowed_forwarding_cards: int,
-) -> List[Tuple[int, int]]:
+) -> Tuple[List[int], int]:
     successful_forwarding_card_list = []
+    forwarding_mask = forwarding_hand & RANK_MASKS[attack[0] >> 2]
     for card in forwarding_card_list:
         if num_of_allowed_forwarding_cards <= 0:
             break
-        if card not in forwarding_hand:
-            continue
-        if card[0] != attack[0][0]:
+        if not (forwarding_mask >> card) & 1:
             continue
-        forwarding_hand.remove(card)
+        forwarding_mask &= ~(1 << card)
+        forwarding_hand &= ~(1 << card)
         if None not in attack:
             attack.append(None)
         attack[attack.index(None)] = card  # Place card in the first available slot
         successful_forwarding_card_list.append(card)
         num_of_allowed_forwarding_cards -= 1
 
-    return successful_forwarding_card_list
+    return successful_forwarding_card_list, forwarding_hand
 
 
 def attack_with_card_list(
-    attack: List[Optional[Tuple[int, int]]],
-    defence: List[Optional[Tuple[int, int]]],
-    attacking_card_list: List[Tuple[int, int]],
-    attacking_hand: List[Tuple[int, int]],
-) -> int:
+    attack: List[Optional[int]],
+    defence: List[Optional[int]],
+    attacking_card_list: List[int],
+    attacking_hand: int,
+) -> Tuple[List[int], int]:
     if attack and all(card is not None for card in attack):
-        return []
+        return [], attacking_hand
     successful_attacking_cards = []
+    allowed_mask = attack_vector(attack, defence)
     for card in attacking_card_list:
-        if card not in attacking_hand:
+        if not (attacking_hand >> card) & 1:
             continue
-        if not valid_to_attack(card, attack, defence):
+        if not (allowed_mask >> card) & 1:
             continue
         if None not in attack:
             break
         attacking_index = attack.index(None)  # First index available for attacking
-        attacking_hand.remove(card)
+        attacking_hand &= ~(1 << card)
         attack[attacking_index] = card
+        if attacking_index == 0:  # The first card of a new attack fixes its rank
+            allowed_mask = RANK_MASKS[card >> 2]
         successful_attacking_cards.append(card)
-    return successful_attacking_cards
-
-
-def make_table_size_of_max_attack_size(
-    table_attack: List[Optional[Tuple[int, int]]],
-    table_defence: List[Optional[Tuple[int, int]]],
-    max_attack_size: int,
-) -> Tuple[List[Optional[Tuple[int, int]]], List[Optional[Tuple[int, int]]]]:
-    while len(table_attack) > max_attack_size:
-        table_attack.pop(None)
-    while len(table_defence) > max_attack_size:
-        table_defence.pop(None)
-    if len(table_attack) < max_attack_size:
-        table_attack.extend([None] * (max_attack_size - len(table_attack)))
-    if len(table_defence) < max_attack_size:
-        table_defence.extend([None] * (max_attack_size - len(table_defence)))
-    return table_attack, table_defence
+    return successful_attacking_cards, attacking_hand
+
+
+class Move(NamedTuple):
+    """What a single step did, with the cards that were actually played."""
+
+    player: int
+    action: str  # "attack", "defend", "forward", "take", "pass" or "burn"
+    cards: List[int]
+    indexes: Tuple[int, ...] = ()  # Defended table indexes, for "defend"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "player": self.player,
+            "action": self.action,
+            "cards": cards_to_strs(self.cards),
+            "indexes": list(self.indexes),
+        }
+
+
+class DurakState:
+    """Mutable, in-memory state of a single game.
+
+    The engine advances this object in place (see advance_state). The JSON-friendly
+    dict used by the API is produced on demand by to_dict and parsed by from_dict.
+    Hands are card masks, the table holds integer cards (or None), and the deck is
+    never mutated: deck[deck_pos:] are the cards that are still in the deck.
+    """
+
+    __slots__ = (
+        "num_of_players",
+        "trump_card",
+        "trump_suit",
+        "lowest_trump",
+        "hands",
+        "table_attack",
+        "table_defence",
+        "attacker",
+        "defender",
+        "curr_player",
+        "deck",
+        "deck_pos",
+        "burn",
+        "num_of_burned_cards",
+        "log",
+        "bot_states",
+        "status",
+        "did_game_init_occur",
+        "last_move",
+        "rng",
+        "zobrist_hash",
+        "pending_events",
+        "log_level",
+        "extra",
+    )
 
+    def __init__(
+        self,
+        hands: List[int],
+        deck: List[int],
+        trump_card: int,
+        attacker: int,
+        lowest_trump: int,
+        rng: Optional[Random] = None,
+    ):
+        num_of_players = len(hands)
+        self.num_of_players: int = num_of_players
+        self.trump_card: int = trump_card
+        self.trump_suit: int = trump_card & 3
+        self.lowest_trump: int = lowest_trump
+        self.hands: List[int] = hands
+        self.table_attack: List[Optional[int]] = []
+        self.table_defence: List[Optional[int]] = []
+        self.attacker: int = attacker
+        self.defender: int = (attacker + 1) % num_of_players
+        self.curr_player: int = attacker
+        self.deck: List[int] = deck
+        self.deck_pos: int = 0
+        self.burn: bool = False
+        self.num_of_burned_cards: int = 0
+        # Log records of every bot, see game_log.py
+        self.log: List[BotLog] = [BotLog() for _ in range(num_of_players)]
+        self.log_level: int = LOG_LEVEL
+        self.bot_states: List[Any] = [{} for _ in range(num_of_players)]
+        self.status: List[str] = ["" for _ in range(num_of_players)]
+        self.did_game_init_occur: bool = False
+        self.last_move: Optional[Move] = None
+        # All the randomness of the game after the deal (e.g. forced attacks) comes from here
+        self.rng: Random = rng if rng is not None else Random()
+        # Zobrist hash of the position, kept up to date by advance_state (see zobrist.py).
+        # Call rehash after setting fields directly.
+        self.zobrist_hash: int = compute_hash(self)
+        # Passive events not yet delivered to each bot (see BATCH_PASSIVE_EVENTS)
+        self.pending_events: List[List[Tuple]] = [[] for _ in range(num_of_players)]
+        # Keys of the state dict that the engine does not use, kept for to_dict
+        self.extra: Dict[str, Any] = {}
+
+    def clone(self) -> "DurakState":
+        """A copy to simulate on, e.g. with rules.apply. It shares the (never mutated) deck
+        with this game, continues from a copy of its rng and starts with empty logs."""
+        game = DurakState.__new__(DurakState)
+        game.num_of_players = self.num_of_players
+        game.trump_card = self.trump_card
+        game.trump_suit = self.trump_suit
+        game.lowest_trump = self.lowest_trump
+        game.hands = self.hands[:]
+        game.table_attack = self.table_attack[:]
+        game.table_defence = self.table_defence[:]
+        game.attacker = self.attacker
+        game.defender = self.defender
+        game.curr_player = self.curr_player
+        game.deck = self.deck
+        game.deck_pos = self.deck_pos
+        game.burn = self.burn
+        game.num_of_burned_cards = self.num_of_burned_cards
+        game.log = [BotLog() for _ in range(self.num_of_players)]
+        game.log_level = self.log_level
+        game.bot_states = self.bot_states[:]
+        game.status = self.status[:]
+        game.did_game_init_occur = self.did_game_init_occur
+        game.last_move = self.last_move
+        game.rng = Random(0)  # Cheaper to seed than Random(), the state is replaced anyway
+        game.rng.setstate(self.rng.getstate())
+        game.zobrist_hash = self.zobrist_hash
+        game.pending_events = [[] for _ in range(self.num_of_players)]
+        game.extra = dict(self.extra)
+        return game
+
+    def rehash(self) -> None:
+        self.zobrist_hash = compute_hash(self)
+
+    @property
+    def deck_count(self) -> int:
+        return len(self.deck) - self.deck_pos
+
+    def draw(self, num_of_cards: int) -> List[int]:
+        num_of_cards = max(0, min(num_of_cards, self.deck_count))
+        drawn_cards = self.deck[self.deck_pos : self.deck_pos + num_of_cards]
+        self.deck_pos += num_of_cards
+        return drawn_cards
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "DurakState":
+        hands = [cards_to_mask(STR_TO_CARD[c] for c in h) for h in state["hands"]]
+        game = cls(
+            hands,
+            [STR_TO_CARD[c] for c in state["deck"]],
+            STR_TO_CARD[state["trump_card"]],
+            state["attacker"],
+            state["lowest_trump"],
+        )
+        game.table_attack = strs_to_cards(state["table_attack"])
+        game.table_defence = strs_to_cards(state["table_defence"])
+        game.defender = state["defender"]
+        game.curr_player = state["curr_player"]
+        game.burn = state["burn"]
+        game.num_of_burned_cards = state["num_of_burned_cards"]
+        log_cursors = state.get("log_cursors") or [None] * len(state["log"])
+        game.log = [BotLog(l, total) for l, total in zip(state["log"], log_cursors)]
+        game.bot_states = list(state.get("bot_states", game.bot_states))
+        game.status = list(state.get("status", game.status))
+        game.did_game_init_occur = state.get("did_game_init_occur", False)
+        game.extra = {k: v for k, v in state.items() if k not in _STATE_DICT_KEYS}
+        game.rehash()
+        return game
+
+    def to_dict(self, include_bot_states: bool = False) -> Dict[str, Any]:
+        """The JSON-friendly state. The bot states (whatever the bots keep, maybe not even
+        JSON-friendly) stay on the server unless include_bot_states is set."""
+        state = {
+            **self.extra,
+            "trump_suit": SUITS[self.trump_suit],
+            "trump_card": CARD_STRS[self.trump_card],
+            "lowest_trump": self.lowest_trump,
+            "hands": [cards_to_strs(mask_to_cards(h)) for h in self.hands],
+            "table_attack": cards_to_strs(self.table_attack),
+            "table_defence": cards_to_strs(self.table_defence),
+            "attacker": self.attacker,
+            "defender": self.defender,
+            "curr_player": self.curr_player,
+            "log": [format_log(l) for l in self.log],
+            # Number of log records of every bot so far, older ones than "log" holds
+            # are at /api/games/{id}/logs
+            "log_cursors": [l.total for l in self.log],
+            "status": self.status,
+            "burn": self.burn,
+            "num_of_burned_cards": self.num_of_burned_cards,
+            "deck": cards_to_strs(self.deck[self.deck_pos :]),
+            "deck_count": self.deck_count,
+            "did_game_init_occur": self.did_game_init_occur,
+        }
+        if include_bot_states:
+            state["bot_states"] = self.bot_states
+        return state
+
+    # What delta_since compares against: hands, log cursors and statuses
+    def snapshot(self) -> Tuple[List[int], List[int], List[str]]:
+        return self.hands[:], [l.total for l in self.log], self.status[:]
+
+    def delta_since(self, snapshot: Tuple[List[int], List[int], List[str]]) -> Dict[str, Any]:
+        """The part of to_dict that changed since snapshot: the last move, the hands
+        that changed, the new log lines, plus the (small) table and counters."""
+        hands, log_cursors, status = snapshot
+        return {
+            "move": self.last_move.to_dict() if self.last_move is not None else None,
+            "hands": {
+                i: cards_to_strs(mask_to_cards(hand))
+                for i, hand in enumerate(self.hands)
+                if hand != hands[i]
+            },
+            "log": {
+                i: format_log(l.since(log_cursors[i]))
+                for i, l in enumerate(self.log)
+                if l.total > log_cursors[i]
+            },
+            "status": self.status if self.status != status else None,
+            "table_attack": cards_to_strs(self.table_attack),
+            "table_defence": cards_to_strs(self.table_defence),
+            "attacker": self.attacker,
+            "defender": self.defender,
+            "curr_player": self.curr_player,
+            "burn": self.burn,
+            "num_of_burned_cards": self.num_of_burned_cards,
+            "deck_count": self.deck_count,
+        }
+
+
+_STATE_DICT_KEYS = frozenset(
+    [
+        "trump_suit",
+        "trump_card",
+        "lowest_trump",
+        "hands",
+        "table_attack",
+        "table_defence",
+        "attacker",
+        "defender",
+        "curr_player",
+        "log",
+        "log_cursors",
+        "bot_states",
+        "status",
+        "burn",
+        "num_of_burned_cards",
+        "deck",
+        "deck_count",
+        "did_game_init_occur",
+    ]
+)
+
+
+def new_game(num_of_players: int, rng: Optional[Random] = None) -> DurakState:
+    """Shuffles and deals a new game. The player with the lowest trump attacks first.
+    The game keeps using rng, so a seeded rng makes the whole game reproducible."""
+    if rng is None:
+        rng = Random()
+    deck = init_deck(rng)
+    trump_card = deck[-1]
+    trump_suit = trump_card & 3
+    hands = [0] * num_of_players
+    for _ in range(CARDS_PER_HAND):
+        for player_index in range(num_of_players):
+            if deck:
+                hands[player_index] |= 1 << deck.pop(0)
+    # Find attacker: player with the lowest trump card (lowest rank of trump suit)
+    lowest_trump = -1
+    attacker = rng.randint(0, num_of_players - 1)
+    for player_index, hand in enumerate(hands):
+        trumps = hand & SUIT_MASKS[trump_suit]
+        if trumps:
+            min_trump = ((trumps & -trumps).bit_length() - 1) >> 2
+            if lowest_trump == -1 or min_trump < lowest_trump:
+                lowest_trump = min_trump
+                attacker = player_index
+    return DurakState(hands, deck, trump_card, attacker, lowest_trump, rng)
+
+
+def get_next_player(game: DurakState, idx: int) -> int:
+    hands = game.hands
+    if game.deck_count:
+        return (idx + 1) % len(hands)
+    for offset in range(1, len(hands) + 1):
+        ni = (idx + offset) % len(hands)
+        if hands[ni]:
+            return ni
+    return idx
+
+
+def get_active_players(game: DurakState) -> List[int]:
+    if game.deck_count:
+        return list(range(game.num_of_players))
+    return [i for i, hand in enumerate(game.hands) if hand]
+
+
+# A player is only out if their hand is empty AND the deck is empty
+def is_game_over(game: DurakState) -> bool:
+    return len(get_active_players(game)) <= 1
+
+
+# The index of the player left holding cards, or -1 if nobody (or more than one player) is left
+def get_loser(game: DurakState) -> int:
+    active_players = get_active_players(game)
+    return active_players[0] if len(active_players) == 1 else -1
+
+
+class Observation:
+    """What the bots are shown of the game at one moment, shared by every bot call made
+    at that moment. The public parts are built once, as tuples, so the bots can't change
+    them; a player's hand is only built when that player's params are asked for."""
+
+    __slots__ = ("hands", "table_attack", "table_defence", "cards_per_hand", "defender", "deck_count")
+
+    def __init__(self, game: DurakState):
+        self.hands: Tuple[int, ...] = tuple(game.hands)
+        self.table_attack: Tuple = tuple(cards_to_tuples(game.table_attack))
+        self.table_defence: Tuple = tuple(cards_to_tuples(game.table_defence))
+        self.cards_per_hand: Tuple[int, ...] = tuple(hand.bit_count() for hand in game.hands)
+        self.defender: int = game.defender
+        self.deck_count: int = game.deck_count
+
+    def params(self, player_index: int) -> Tuple:
+        # The arguments of a bot call after the message (hand, table, ...)
+        return (
+            mask_to_tuples(self.hands[player_index]),
+            self.table_attack,
+            self.table_defence,
+            self.cards_per_hand,
+            self.defender,
+            self.deck_count,
+        )
 
-def advance_game_step(
-    state: Dict[str, Any], bots: List[Any], bot_names: Optional[List[str]] = None
-) -> Dict[str, Any]:
 
-    if bot_names is None:
-        bot_names = [f"Bot {i}" for i in range(len(bots))]
-    num_of_players = len(bots)
-    num_of_burned_cards = state["num_of_burned_cards"]
-    attacker = state["attacker"]
-    defender = state["defender"]
-    lowest_trump = state["lowest_trump"]
-    hands = [card_list_strs_to_tuples(h) for h in state["hands"]]
-
-    def get_next_player(idx: int) -> int:
-        deck = state.get("deck", [])
-        if deck:
-            return (idx + 1) % len(hands)
-        for offset in range(1, len(hands) + 1):
+def get_params(game: DurakState, player_index: int) -> Tuple:
+    return Observation(game).params(player_index)
+
+
+def inform_active_players(game: DurakState, bots: List[Any], message: Any) -> None:
+    if BATCH_PASSIVE_EVENTS:
+        for player_index in get_active_players(game):
+            game.pending_events[player_index].append(message)
+        return
+    inform_all(game, bots, get_active_players(game), message, Observation(game))
+
+
+# Delivers the queued passive events of a bot in a single EVENT_BATCH call
+def flush_events(game: DurakState, bots: List[Any], player_index: int) -> None:
+    events = game.pending_events[player_index]
+    if not events:
+        return
+    game.pending_events[player_index] = []
+    result = inform(
+        bots[player_index],
+        (Input_actions.EVENT_BATCH, tuple(events)),
+        get_params(game, player_index),
+        game.bot_states[player_index],
+    )
+    apply_inform_result(game, player_index, result)
+
+
+def flush_all_events(game: DurakState, bots: List[Any]) -> None:
+    for player_index in range(game.num_of_players):
+        flush_events(game, bots, player_index)
+
+
+# Log records keep the text of an error instead of the exception, whose traceback would
+# keep the bot and the game alive as long as the record
+def error_text(e: BaseException) -> str:
+    return f"{type(e).__name__}: {e}"
+
+
+# Helper to add a log record for a specific bot, formatted only when the log is read.
+# The args must not change afterwards, so nothing a bot returned is logged as it is.
+def add_log(game: DurakState, bot_idx: int, event: LogEvent, *args: Any) -> None:
+    if LOG_EVENT_LEVELS[event] >= game.log_level and 0 <= bot_idx < len(game.log):
+        game.log[bot_idx].append((time(), ENGINE_SOURCE, event, args))
+
+
+def add_logs(game: DurakState, bot_idx: int, entries: List[Any]) -> None:
+    if game.log_level < LOG_OFF and 0 <= bot_idx < len(game.log):
+        game.log[bot_idx].extend(entries)
+
+
+# Helper to set a status entry for a specific bot
+def set_status(game: DurakState, bot_idx: int, entry: str) -> None:
+    if 0 <= bot_idx < len(game.status):
+        game.status[bot_idx] = entry
+
+
+# Applies the dict a bot returned (action, state, log, status) and returns the action
+def handle_bot_result(game: DurakState, player_index: int, result: Any) -> Any:
+    if not isinstance(result, dict):
+        return result
+    bot_logs = result.get("log")
+    bot_status = result.get("status")
+    game.bot_states[player_index] = result.get("state", game.bot_states[player_index])
+    if bot_logs:
+        add_logs(game, player_index, bot_logs)
+    if bot_status:
+        set_status(game, player_index, bot_status)
+    return result.get("action")
+
+
+def init_game(game: DurakState, bots: List[Any]) -> None:
+    observation = Observation(game)
+    for player_index, bot in enumerate(bots):
+        result = inform(
+            bot,
+            (
+                Input_actions.GAME_INIT,
+                game.num_of_players,
+                player_index,
+                mask_to_tuples(game.hands[player_index]),
+                CARD_TUPLES[game.trump_card],
+                game.attacker,
+                game.lowest_trump,
+            ),
+            observation.params(player_index),
+            game.bot_states[player_index],
+        )
+        if isinstance(result, dict):
+            if "state" in result:
+                game.bot_states[player_index] = result["state"]
+            if "log" in result:
+                add_logs(game, player_index, result["log"])
+            if "status" in result:
+                set_status(game, player_index, result["status"])
+    game.did_game_init_occur = True
+
+
+def take(game: DurakState, bots: List[Any]) -> None:
+    defender = game.defender
+    cards_to_hand = real_cards(game.table_attack + game.table_defence)
+    inform_active_players(
+        game,
+        bots,
+        (Input_actions.TAKE_PASSIVE, defender, tuple(cards_to_tuples(cards_to_hand))),
+    )
+    add_log(game, defender, LogEvent.TOOK_CARDS, defender, cards_to_hand)
+    game.hands[defender] |= cards_to_mask(cards_to_hand)
+    game.last_move = Move(defender, "take", cards_to_hand)
+
+
+# --- WINNER DETECTION AND REMOVAL ---
+# Marks winners and removes them from the round
+def update_winners_and_remove(game: DurakState, bots: List[Any]) -> None:
+    hands = game.hands
+    # Mark as "WON" if hand is empty and not already marked
+    for i, hand in enumerate(hands):
+        if not hand and game.status[i] != "WON":
+            game.status[i] = "WON"
+            inform_active_players(
+                game, bots, (Input_actions.WINNER_PASSIVE, game.curr_player)
+            )
+            add_log(game, i, LogEvent.WON, i)
+    # Remove all players who have won from the round (but keep them in the state for UI)
+    # Only active players participate in the round
+    if not any(hands):
+        return
+
+    def closest_active(idx):
+        for offset in range(len(hands) + 1):
             ni = (idx + offset) % len(hands)
-            if len(hands[ni]) > 0:
+            if hands[ni]:
                 return ni
         return idx
 
-    def get_active_players():
-        deck = state.get("deck", [])
-        return [i for i in range(num_of_players) if deck or len(hands[i]) != 0]
+    game.attacker = closest_active(game.attacker)
+    game.defender = closest_active(game.defender)
+    game.curr_player = closest_active(game.curr_player)
+    # If only one player left, game is over (handled by frontend/end condition)
+
+
+def draw_to_hand(
+    game: DurakState, bots: List[Any], player_index: int, observation: Optional[Observation]
+) -> None:
+    drawn_cards = game.draw(CARDS_PER_HAND - game.hands[player_index].bit_count())
+    if len(drawn_cards) > 0:
+        game.hands[player_index] |= cards_to_mask(drawn_cards)
+        message = (Input_actions.TO_HAND, cards_to_tuples(drawn_cards))
+        if BATCH_PASSIVE_EVENTS:
+            game.pending_events[player_index].append(message)
+        else:
+            inform(
+                bots[player_index],
+                message,
+                observation.params(player_index),
+                game.bot_states[player_index],
+            )
+        add_log(game, player_index, LogEvent.DREW, player_index, drawn_cards)
+
+
+# --- Deal cards to players after round ends ---
+def end_round(game: DurakState, bots: List[Any], is_defence_successful: bool) -> None:
+    num_of_players = game.num_of_players
+    # The player who started the attack
+    curr_attacker = game.attacker
+    curr_defender = game.defender
+    # Deal to all players in cyclic order, starting from the attacker, skipping the defender.
+    # Bots are shown the game as it was before the draws
+    observation = Observation(game) if not BATCH_PASSIVE_EVENTS else None
+    for i in range(num_of_players):
+        player_index: int = (curr_attacker + i) % num_of_players
+        if player_index == curr_defender:
+            continue
+        draw_to_hand(game, bots, player_index, observation)
+    # Deal to defender last
+    draw_to_hand(game, bots, curr_defender, observation)
+    # Reset table attack and defence
+    game.table_attack = []
+    game.table_defence = []
+    game.attacker = (
+        curr_defender if is_defence_successful else get_next_player(game, curr_defender)
+    )
+    game.defender = get_next_player(game, game.attacker)
+    game.curr_player = game.attacker  # Reset current player to the new attacker
+
 
-    table_attack = [card_str_to_tuple(c) for c in state["table_attack"]]
-    table_defence = [card_str_to_tuple(c) for c in state["table_defence"]]
+# Sizes the table for the next step: as many slots as the defender may have to beat
+def prepare_table(game: DurakState) -> None:
+    table_attack = game.table_attack
+    table_defence = game.table_defence
     max_attack_size = min(
-        len(hands[defender]),
-        MAX_ATTACK_SIZE_AFTER_BURN if state["burn"] else STARTING_MAX_ATTACK_SIZE,
+        game.hands[game.defender].bit_count(),
+        MAX_ATTACK_SIZE_AFTER_BURN if game.burn else STARTING_MAX_ATTACK_SIZE,
     )
     if not table_attack or all(card is None for card in table_attack):
-        table_attack, table_defence = make_table_size_of_max_attack_size(
-            table_attack, table_defence, max_attack_size
-        )
+        # A table without attacks can also shrink (e.g. the defender has fewer cards)
+        del table_attack[max_attack_size:]
+        del table_defence[max_attack_size:]
     if len(table_defence) < max_attack_size:
         table_defence.extend([None] * (max_attack_size - len(table_defence)))
     if len(table_attack) < max_attack_size:
         table_attack.extend([None] * (max_attack_size - len(table_attack)))
+
+
+def advance_state(
+    game: DurakState, bots: List[Any], bot_names: Optional[List[str]] = None
+) -> None:
+    """Advances the game by a single step, in place."""
+    if bot_names is None:
+        bot_names = [f"Bot {i}" for i in range(len(bots))]
+    hands = game.hands
+    defender = game.defender
+    curr_player = game.curr_player
+    table_attack = game.table_attack
+    table_defence = game.table_defence
+    hash_before = hash_snapshot(game)
+    prepare_table(game)
     end_of_round = False
     is_defence_successful = (
         True  # If the attack is successful, the defender will be the next player
     )
-    trump_suit = SUITS.index(state["trump_suit"])
-    # log is now a list of lists, one per bot
-    log = [l[:] for l in state["log"]]
-    bot_states = state.get("bot_states", [{} for _ in bots])
-    curr_player = state["curr_player"]
-    # Add a status list per bot if not present
-    status = state.get("status", ["" for _ in bots])
-    did_game_init_occur: bool = state.get("did_game_init_occur", False)
-
-    def get_params_list():
-        return [
-            (
-                hands[player_index].copy(),
-                table_attack.copy(),
-                table_defence.copy(),
-                [len(hand) for hand in hands],
-                defender,
-                state["deck_count"],
-            )
-            for player_index in get_active_players()
-        ]
-
-    if not did_game_init_occur:
+    game.last_move = None
 
-        params_list = get_params_list()
-        for player_index, bot in enumerate(bots):
-            result = inform(
-                bot,
-                (
-                    Input_actions.GAME_INIT,
-                    num_of_players,
-                    player_index,
-                    hands[player_index],
-                    card_str_to_tuple(state["trump_card"]),
-                    attacker,
-                    lowest_trump,
-                ),
-                params_list[player_index],
-                bot_states[player_index],
-            )
-            if isinstance(result, dict):
-                if "state" in result:
-                    bot_states[player_index] = result["state"]
-                if "log" in result:
-                    log[player_index].extend(result["log"])
-                if "status" in result:
-                    set_status(player_index, result["status"])
-        did_game_init_occur = True
-
-    def take() -> None:
-        cards_to_hand = real_cards(table_attack + table_defence)
-        inform_all(
-            bots,
-            get_active_players(),
-            (Input_actions.TAKE_PASSIVE, defender, tuple(cards_to_hand)),
-            get_params_list(),
-            bot_states,
-            log,
-        )
-        add_log(
-            defender,
-            f"Player {defender} took cards: {card_list_tuples_to_strs(cards_to_hand)}",
-        )
-        for card in cards_to_hand:
-            hands[defender].append(card)
-
-    # --- WINNER DETECTION AND REMOVAL ---
-    # Helper to mark winners and remove them from the round
-    def update_winners_and_remove():
-        nonlocal hands, bots, bot_names, log, status, attacker, defender, curr_player, num_of_players
-        # Mark as "WON" if hand is empty and not already marked
-        for i, hand in enumerate(hands):
-            if len(hand) == 0 and status[i] != "WON":
-                status[i] = "WON"
-                inform_all(
-                    bots,
-                    get_active_players(),
-                    (Input_actions.WINNER_PASSIVE, curr_player),
-                    get_params_list(),
-                    bot_states,
-                    log,
-                )
-                add_log(i, f"Player {i} has WON!")
-        # Remove all players who have won from the round (but keep them in the state for UI)
-        # Only active players participate in the round
-        active_indices = [i for i, hand in enumerate(hands) if len(hand) > 0]
-        if not active_indices:
-            return
-
-        def closest_active(idx):
-            for offset in range(len(hands) + 1):
-                ni = (idx + offset) % len(hands)
-                if len(hands[ni]) > 0:
-                    return ni
-            return idx
-
-        attacker = closest_active(attacker)
-        defender = closest_active(defender)
-        curr_player = closest_active(curr_player)
-        # If only one player left, game is over (handled by frontend/end condition)
-
-    # Helper to add a log entry for a specific bot
-    def add_log(bot_idx, entry):
-        if 0 <= bot_idx < len(log) and isinstance(entry, str):
-            ts = time()
-            log[bot_idx].append(f"[TS:{ts}]Game: {entry}")
-
-    def add_logs(bot_idx, entries):
-        if 0 <= bot_idx < len(log):
-            log[bot_idx].extend(entries)
-
-    # Helper to set a status entry for a specific bot
-    def set_status(bot_idx, entry):
-        if 0 <= bot_idx < len(status):
-            status[bot_idx] = entry
+    if not game.did_game_init_occur:
+        init_game(game, bots)
 
     if curr_player == defender:
         if all(
-            table_defence[index] != None or table_attack[index] == None
+            table_defence[index] is not None or table_attack[index] is None
             for index in range(len(table_attack))
         ):
-            burned_cards = tuple(real_cards(table_attack + table_defence))
-            num_of_burned_cards += len(burned_cards)
-            inform_all(
-                bots,
-                get_active_players(),
-                (Input_actions.BURN, burned_cards),
-                get_params_list(),
-                bot_states,
-                log,
-            )
-            state["burn"] = True
-            add_log(
-                defender,
-                f"Player {defender} burned cards: {card_list_tuples_to_strs(burned_cards)}",
+            burned_cards = real_cards(table_attack + table_defence)
+            game.num_of_burned_cards += len(burned_cards)
+            inform_active_players(
+                game, bots, (Input_actions.BURN, tuple(cards_to_tuples(burned_cards)))
             )
+            game.burn = True
+            game.last_move = Move(defender, "burn", burned_cards)
+            add_log(game, defender, LogEvent.BURNED, defender, burned_cards)
             end_of_round = True
             is_defence_successful = True
         else:
-            # Find the first attack card that is not defended
-            attack_card = None
-            for i in range(len(table_attack)):
-                if table_attack[i] is not None and (table_defence[i] is None):
-                    attack_card = table_attack[i]
-                    break
+            flush_events(game, bots, curr_player)
             # Call bot with correct signature
             try:
                 result = call_bot(
                     bots[curr_player],
                     (Input_actions.DEFENCE,),
-                    hands[curr_player].copy(),
-                    table_attack.copy(),
-                    table_defence.copy(),
-                    [len(hand) for hand in hands],
-                    defender,
-                    state["deck_count"],
-                    bot_states[curr_player],
+                    *get_params(game, curr_player),
+                    game.bot_states[curr_player],
                 )
             except Exception as e:
-                add_log(curr_player, f"Error in defence of player {curr_player}: {e}")
+                add_log(game, curr_player, LogEvent.DEFENCE_ERROR, curr_player, error_text(e))
                 result = Output_actions.TAKE
             # If bot returns dict, extract log/status
-            if isinstance(result, dict):
-                action = result.get("action")
-                bot_logs = result.get("log")
-                bot_status = result.get("status")
-                bot_states[curr_player] = result.get("state", bot_states[curr_player])
-                if bot_logs:
-                    add_logs(curr_player, bot_logs)
-                if bot_status:
-                    set_status(curr_player, bot_status)
-            else:
-                action = result
+            action = handle_bot_result(game, curr_player, result)
             if valid_action_format(action):
                 if action[0] == Output_actions.DEFEND:
-                    successful_defending_cards, successful_index_list = (
+                    successful_defending_cards, successful_index_list, hands[curr_player] = (
                         defend_with_card_list(
                             action[2],
-                            action[1],
+                            tuples_to_cards(action[1]),
                             table_attack,
                             table_defence,
                             hands[curr_player],
-                            trump_suit,
+                            game.trump_suit,
                         )
                     )
                     if len(successful_defending_cards) > 0:
-                        inform_all(
+                        game.last_move = Move(
+                            curr_player,
+                            "defend",
+                            successful_defending_cards,
+                            tuple(successful_index_list),
+                        )
+                        inform_active_players(
+                            game,
                             bots,
-                            get_active_players(),
                             (
                                 Input_actions.DEFENCE_PASSIVE,
                                 curr_player,
-                                successful_defending_cards,
+                                cards_to_tuples(successful_defending_cards),
                                 successful_index_list,
                             ),
-                            get_params_list(),
-                            bot_states,
-                            log,
                         )
                         add_log(
-                            curr_player,
-                            f"Player {curr_player} defended with {card_list_tuples_to_strs(successful_defending_cards)}",
+                            game, curr_player, LogEvent.DEFENDED, curr_player, successful_defending_cards
                         )
                     else:
-                        take()
+                        take(game, bots)
                         end_of_round = True
                         is_defence_successful = False
 
-                        add_log(curr_player, f"Player {curr_player} took cards")
+                        add_log(game, curr_player, LogEvent.TOOK, curr_player)
                 elif action[0] == Output_actions.FORWARD:
-                    num_of_allowed_forwarding_cards = len(
-                        hands[get_next_player(defender)]
-                    ) - len(real_cards(table_attack))
+                    num_of_allowed_forwarding_cards = hands[
+                        get_next_player(game, defender)
+                    ].bit_count() - len(real_cards(table_attack))
 
                     if (
                         any(c is not None for c in table_defence)
                         or num_of_allowed_forwarding_cards <= 0
                         or not valid_action_format(action)
                     ):
-                        take()
+                        take(game, bots)
                         end_of_round = True
                         is_defence_successful = False
-                        add_log(defender, f"Player {defender} took cards")
+                        add_log(game, defender, LogEvent.TOOK, defender)
                     else:
-                        forwarding_card_list = action[1]
-                        successful_forwarding_card_list = forward_with_card_list(
-                            forwarding_card_list,
+                        successful_forwarding_card_list, hands[defender] = forward_with_card_list(
+                            tuples_to_cards(action[1]),
                             table_attack,
                             hands[defender],
                             num_of_allowed_forwarding_cards,
                         )
                         if len(successful_forwarding_card_list) > 0:
-                            inform_all(
+                            game.last_move = Move(
+                                defender, "forward", successful_forwarding_card_list
+                            )
+                            inform_active_players(
+                                game,
                                 bots,
-                                get_active_players(),
                                 (
                                     Input_actions.FORWARD_PASSIVE,
                                     defender,
-                                    successful_forwarding_card_list,
+                                    cards_to_tuples(successful_forwarding_card_list),
                                 ),
-                                get_params_list(),
-                                bot_states,
-                                log,
                             )
                             add_log(
-                                defender,
-                                f"Player {defender} forwarded cards {card_list_tuples_to_strs(successful_forwarding_card_list)}",
+                                game, defender, LogEvent.FORWARDED, defender, successful_forwarding_card_list
                             )
-                            defender = get_next_player(defender)
-                            allowed_attack_length = len(hands[defender])
+                            game.defender = get_next_player(game, defender)
+                            allowed_attack_length = hands[game.defender].bit_count()
                             assert (
                                 len(table_attack) <= allowed_attack_length
-                                or table_attack[allowed_attack_length] == None
+                                or table_attack[allowed_attack_length] is None
                             )
-                            table_attack = table_attack[:allowed_attack_length]
-                            table_defence = table_defence[:allowed_attack_length]
+                            del table_attack[allowed_attack_length:]
+                            del table_defence[allowed_attack_length:]
                         else:
-                            add_log(defender, "No valid forwarding cards, taking cards")
-                            take()
+                            add_log(game, defender, LogEvent.NO_VALID_FORWARD)
+                            take(game, bots)
                             end_of_round = True
                             is_defence_successful = False
-                            add_log(defender, f"Player {defender} took cards")
+                            add_log(game, defender, LogEvent.TOOK, defender)
                 else:
-                    take()
+                    take(game, bots)
                     end_of_round = True
                     is_defence_successful = False
-                    add_log(curr_player, f"Player {curr_player} took cards")
+                    add_log(game, curr_player, LogEvent.TOOK, curr_player)
 
             else:
-                add_log(curr_player, f"Invalid defence action: {action}. Taking cards.")
-                take()
+                add_log(game, curr_player, LogEvent.INVALID_DEFENCE, repr(action))
+                take(game, bots)
                 end_of_round = True
                 is_defence_successful = False
     else:  # If the current player is not the defender, they are attacking
+        is_first_attack = all(card is None for card in table_attack)
+        flush_events(game, bots, curr_player)
         try:
             result = call_bot(
                 bots[curr_player],
                 (
                     (
                         Input_actions.FIRST_ATTACK
-                        if all(card is None for card in table_attack)
+                        if is_first_attack
                         else Input_actions.OPTIONAL_ATTACK
                     ),
                 ),
-                hands[curr_player].copy(),
-                table_attack.copy(),
-                table_defence.copy(),
-                [len(hand) for hand in hands],
-                defender,
-                state["deck_count"],
-                bot_states[curr_player],
+                *get_params(game, curr_player),
+                game.bot_states[curr_player],
             )
         except Exception as e:
-            add_log(curr_player, f"Bot {bot_names[curr_player]} raised an exception during attack: {e}. Passing.\n")
+            add_log(game, curr_player, LogEvent.ATTACK_ERROR, bot_names[curr_player], error_text(e))
             result = Output_actions.PASS
-        if isinstance(result, dict):
-            action = result.get("action")
-            bot_logs = result.get("log")
-            bot_status = result.get("status")
-            bot_states[curr_player] = result.get("state", bot_states[curr_player])
-            if bot_logs:
-                add_logs(curr_player, bot_logs)
-            if bot_status:
-                set_status(curr_player, bot_status)
-        else:
-            action = result
+        action = handle_bot_result(game, curr_player, result)
 
         # The first attack case: player has to attack with at least 1 card.
         is_succesful_attack = False
-        if all(card is None for card in table_attack):
+        if is_first_attack:
             if valid_action_format(action) and action[0] == Output_actions.ATTACK:
-                successful_attacking_cards = attack_with_card_list(
-                    table_attack, table_defence, action[1], hands[curr_player]
+                successful_attacking_cards, hands[curr_player] = attack_with_card_list(
+                    table_attack, table_defence, tuples_to_cards(action[1]), hands[curr_player]
                 )
                 is_succesful_attack = len(successful_attacking_cards) > 0
             if is_succesful_attack:
-                inform_all(
+                game.last_move = Move(curr_player, "attack", successful_attacking_cards)
+                inform_active_players(
+                    game,
                     bots,
-                    get_active_players(),
                     (
                         Input_actions.FIRST_ATTACK_PASSIVE,
                         curr_player,
-                        successful_attacking_cards,
+                        cards_to_tuples(successful_attacking_cards),
                     ),
-                    get_params_list(),
-                    bot_states,
-                    log,
-                )
-                add_log(
-                    curr_player,
-                    f"Player {curr_player} attacked with {card_list_tuples_to_strs(successful_attacking_cards)}",
                 )
+                add_log(game, curr_player, LogEvent.ATTACKED, curr_player, successful_attacking_cards)
             if not is_succesful_attack:
                 # If this is the first attack (all table_attack are None), pick a random card from hand and attack with it
                 if hands[curr_player]:
-                    random_card = choice(hands[curr_player])
-                    add_log(
-                        curr_player,
-                        f"Invalid first attack action. Forcing attack with random card from hand: {random_card}"
-                    )
-                    card_singelton: List[Tuple[int, int]] = attack_with_card_list(
+                    random_card = game.rng.choice(mask_to_cards(hands[curr_player]))
+                    add_log(game, curr_player, LogEvent.INVALID_FIRST_ATTACK, random_card)
+                    card_singelton, hands[curr_player] = attack_with_card_list(
                         table_attack, table_defence, [random_card], hands[curr_player]
                     )
                     assert card_singelton == [
                         random_card
                     ], "Forced attack should always succeed"
-                    inform_all(
+                    game.last_move = Move(curr_player, "attack", card_singelton)
+                    inform_active_players(
+                        game,
                         bots,
-                        get_active_players(),
                         (
                             Input_actions.FIRST_ATTACK_PASSIVE,
                             curr_player,
-                            [random_card],
+                            [CARD_TUPLES[random_card]],
                         ),
-                        get_params_list(),
-                        bot_states,
-                        log,
-                    )
-                    add_log(
-                        curr_player,
-                        f"Player {curr_player} attacked with {card_list_tuples_to_strs([random_card])} (forced random)",
                     )
+                    add_log(game, curr_player, LogEvent.FORCED_ATTACK, curr_player, random_card)
                 else:
                     raise ValueError(
                         f"Player {curr_player} has no cards to attack with in the first attack"
@@ -728,122 +1047,46 @@ def advance_game_step(
         # The regular attack case: player can attack with 0 or more cards.
         else:
             if valid_action_format(action) and action[0] == Output_actions.ATTACK:
-                successful_attacking_cards = attack_with_card_list(
-                    table_attack, table_defence, action[1], hands[curr_player]
+                successful_attacking_cards, hands[curr_player] = attack_with_card_list(
+                    table_attack, table_defence, tuples_to_cards(action[1]), hands[curr_player]
                 )
                 is_succesful_attack = len(successful_attacking_cards) > 0
 
             if is_succesful_attack:
-                inform_all(
+                game.last_move = Move(curr_player, "attack", successful_attacking_cards)
+                inform_active_players(
+                    game,
                     bots,
-                    get_active_players(),
                     (
                         Input_actions.OPTIONAL_ATTACK_PASSIVE,
                         curr_player,
-                        successful_attacking_cards,
+                        cards_to_tuples(successful_attacking_cards),
                     ),
-                    get_params_list(),
-                    bot_states,
-                    log,
-                )
-                add_log(
-                    curr_player,
-                    f"Player {curr_player} attacked with {card_list_tuples_to_strs(successful_attacking_cards)}",
                 )
+                add_log(game, curr_player, LogEvent.ATTACKED, curr_player, successful_attacking_cards)
             else:
-                inform_all(
-                    bots,
-                    get_active_players(),
-                    (Input_actions.PASS_PASSIVE, curr_player),
-                    get_params_list(),
-                    bot_states,
-                    log,
-                )
-                add_log(curr_player, f"Unsuccessful attack. Player {curr_player} passes")
-    # --- Deal cards to players after round ends ---
-    if end_of_round:
-        # Get deck from state (if present), else empty
-        deck = state.get("deck", [])
-        # Convert deck from string to tuple if needed
-        if deck and isinstance(deck[0], str):
-            deck = [card_str_to_tuple(c) for c in deck]
-        # The player who started the attack
-        curr_attacker = attacker
-        curr_defender = defender
-        # Deal to all players in cyclic order, starting from the attacker, skipping the defender.
-        params_list = get_params_list()
-        for i in range(num_of_players):
-            player_index: int = (curr_attacker + i) % num_of_players
-            if player_index == curr_defender:
-                continue
-            drawn_cards = []
-            for _ in range(min(len(deck), CARDS_PER_HAND - len(hands[player_index]))):
-                drawn_cards.append(deck.pop(0))
-            hands[player_index].extend(drawn_cards)
-            if len(drawn_cards) > 0:
-                inform(
-                    bots[player_index],
-                    (Input_actions.TO_HAND, drawn_cards.copy()),
-                    params_list[player_index],
-                    bot_states[player_index],
+                game.last_move = Move(curr_player, "pass", [])
+                inform_active_players(
+                    game, bots, (Input_actions.PASS_PASSIVE, curr_player)
                 )
-                add_log(
-                    player_index,
-                    f"Player {player_index} drew cards: {card_list_tuples_to_strs(drawn_cards)}",
-                )
-        # Deal to defender last
-        drawn_cards = []
-        for _ in range(min(len(deck), CARDS_PER_HAND - len(hands[curr_defender]))):
-            drawn_cards.append(deck.pop(0))
+                add_log(game, curr_player, LogEvent.PASSED, curr_player)
 
-        hands[curr_defender].extend(drawn_cards)
-        if len(drawn_cards) > 0:
-            inform(
-                bots[curr_defender],
-                (Input_actions.TO_HAND, drawn_cards.copy()),
-                params_list[curr_defender],
-                bot_states[curr_defender],
-            )
-            add_log(
-                curr_defender,
-                f"Player {curr_defender} drew cards: {card_list_tuples_to_strs(drawn_cards)}",
-            )
-        # Update deck in state
-        state["deck"] = deck
-        state["deck_count"] = len(deck)
-        # Reset table attack and defence
-        table_attack = []
-        table_defence = []
-        attacker = defender if is_defence_successful else get_next_player(defender)
-        defender = get_next_player(attacker)
-        curr_player = attacker  # Reset current player to the new attacker
+    if end_of_round:
+        end_round(game, bots, is_defence_successful)
     else:  # The round is not over, just increment curr_player and check for wins
-        curr_player = get_next_player(curr_player)
+        game.curr_player = get_next_player(game, curr_player)
 
     # Update winners and remove them from the round
-    if state["deck_count"] == 0:
-        update_winners_and_remove()
-        pass
-
-    # Always update deck_count before returning state
-    state["deck_count"] = len(state.get("deck"))
-
-    hands_str = [card_list_tuples_to_strs(h) for h in hands]
-    table_attack_str = [card_tuple_to_str(c) for c in table_attack]
-    table_defence_str = [card_tuple_to_str(c) for c in table_defence]
-
-    return {
-        **state,
-        "hands": hands_str,
-        "table_attack": table_attack_str if not end_of_round else [],
-        "table_defence": table_defence_str if not end_of_round else [],
-        "attacker": attacker,
-        "defender": defender,
-        "log": log,
-        "bot_states": bot_states,
-        "curr_player": curr_player,
-        "status": status,
-        "num_of_burned_cards": num_of_burned_cards,
-        "deck_count": state["deck_count"],
-        "did_game_init_occur": did_game_init_occur,
-    }
+    if game.deck_count == 0:
+        update_winners_and_remove(game, bots)
+        if BATCH_PASSIVE_EVENTS and is_game_over(game):
+            flush_all_events(game, bots)
+    update_hash(game, hash_before)
+
+
+def advance_game_step(
+    state: Dict[str, Any], bots: List[Any], bot_names: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    game = DurakState.from_dict(state)
+    advance_state(game, bots, bot_names)
+    return game.to_dict(include_bot_states=True)
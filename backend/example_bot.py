@@ -19,6 +19,7 @@ class ExampleBot(AbstractBot):
         ordered_suits[3] = self.get_kozar_suit()
         # ordering the cards in an increasing order (one of a few possible orders).
         self.card_order = [(i, suit) for suit in ordered_suits for i in range(13)]
+        self.card_position = {card: i for i, card in enumerate(self.card_order)}
 
     def optional_attack(self):
         for card in self.get_hand():
@@ -26,13 +27,13 @@ class ExampleBot(AbstractBot):
                 if table_card is None:
                     continue
                 if table_card[0] == card[0]:
-                    self.log(f"Joining attack with: {card}")
+                    self.log("Joining attack with: %s", card)
                     return [card]
         self.log("Passing on joining attack.")
         return []
 
     def first_attack(self):
-        self.log(f"Starting attack with {self.get_hand()[0]}")
+        self.log("Starting attack with %s", self.get_hand()[0])
         return self.get_hand()[0:1]
 
     def defence(self):
@@ -43,14 +44,14 @@ class ExampleBot(AbstractBot):
             for card in self.get_hand():
                 if card[0] == num:
                     # forward
-                    self.log(f"Forwarding {card}")
+                    self.log("Forwarding %s", card)
                     return [card],[]
         for index,attacking_card in enumerate(self.get_table_attack()):
             if attacking_card is None or self.get_table_defence()[index] is not None:
                 continue
             flag: bool = False
             for card in self.get_hand():
-                if self.card_order.index(attacking_card) < self.card_order.index(card):
+                if self.card_position[attacking_card] < self.card_position[card]:
                     defending_cards.append(card)
                     indexes.append(index)
                     flag = True
@@ -59,35 +60,35 @@ class ExampleBot(AbstractBot):
             if not flag:
                 self.log("Taking cards.")
                 return [],[]
-        self.log(f"Defending with {defending_cards}, {indexes}")
+        self.log("Defending with %s, %s", defending_cards, indexes)
         return defending_cards, indexes
     
     def notify_burn(self, card_list):
-        self.log(f"burn: {card_list}")
+        self.log("burn: %s", card_list)
 
     def notify_cards_drawn_to_hand(self, card_list):
-        self.log(f"cards drawn to hand: {card_list}")
+        self.log("cards drawn to hand: %s", card_list)
     
     def notify_winner(self, winner_index):
-        self.log(f"Winner: {winner_index}")
+        self.log("Winner: %s", winner_index)
     
     def notify_pass(self, player_index):
-        self.log(f"Player {player_index} passed")
+        self.log("Player %s passed", player_index)
     
     def notify_optional_attack(self, player_index, cards):
-        self.log(f"Player {player_index} optional attack with cards: {cards}")
+        self.log("Player %s optional attack with cards: %s", player_index, cards)
     
     def notify_first_attack(self, player_index, cards):
-        self.log(f"Player {player_index} first attack with cards: {cards}")
+        self.log("Player %s first attack with cards: %s", player_index, cards)
     
     def notify_defence(self, player_index, defending_cards, indexes):
-        self.log(f"Player {player_index} defended with cards: {defending_cards} at indexes: {indexes}")
+        self.log("Player %s defended with cards: %s at indexes: %s", player_index, defending_cards, indexes)
     
     def notify_forward(self, forwarder_index, card_list):
-        self.log(f"Player {forwarder_index} forwarded with cards: {card_list}")
+        self.log("Player %s forwarded with cards: %s", forwarder_index, card_list)
     
     def notify_take(self, defender_index, card_list):
-        self.log(f"Player {defender_index} took cards: {card_list}")
+        self.log("Player %s took cards: %s", defender_index, card_list)
     
     
 
@@ -0,0 +1,156 @@
+# Structured game logs.
+# The engine and AbstractBot keep log records instead of text: (timestamp, source, event, args),
+# where source is -1 for the engine (event is a LogEvent) and the bot index for bot messages
+# (event is the message, formatted with args like "%s" % args). Records are only turned into
+# text by format_record, when the log is read (e.g. by DurakState.to_dict). Records below the
+# log level of the game or bot are never created, and LOG_OFF drops all of them.
+# Every bot's records are kept in a BotLog, which only holds the last LOG_BUFFER_SIZE of
+# them; the API writes the full log to the database (see main.play_step).
+
+from collections import deque
+from enum import IntEnum
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from configurations import LOG_BUFFER_SIZE
+from cards import CARD_TUPLES, cards_to_strs
+
+DEBUG: int = 10
+INFO: int = 20
+WARNING: int = 30
+LOG_OFF: int = 100
+
+ENGINE_SOURCE: int = -1
+
+LogRecord = Tuple[float, int, Any, tuple]
+
+
+class LogEvent(IntEnum):
+    ATTACKED = 0  # (player, cards)
+    FORCED_ATTACK = 1  # (player, card)
+    INVALID_FIRST_ATTACK = 2  # (card,)
+    ATTACK_ERROR = 3  # (bot_name, error text)
+    PASSED = 4  # (player,)
+    DEFENDED = 5  # (player, cards)
+    DEFENCE_ERROR = 6  # (player, error text)
+    INVALID_DEFENCE = 7  # (repr of the action,)
+    FORWARDED = 8  # (player, cards)
+    NO_VALID_FORWARD = 9  # ()
+    TOOK = 10  # (player,)
+    TOOK_CARDS = 11  # (player, cards)
+    BURNED = 12  # (player, cards)
+    DREW = 13  # (player, cards)
+    WON = 14  # (player,)
+
+
+LOG_EVENT_LEVELS: Dict[LogEvent, int] = {
+    LogEvent.ATTACKED: INFO,
+    LogEvent.FORCED_ATTACK: INFO,
+    LogEvent.INVALID_FIRST_ATTACK: WARNING,
+    LogEvent.ATTACK_ERROR: WARNING,
+    LogEvent.PASSED: INFO,
+    LogEvent.DEFENDED: INFO,
+    LogEvent.DEFENCE_ERROR: WARNING,
+    LogEvent.INVALID_DEFENCE: WARNING,
+    LogEvent.FORWARDED: INFO,
+    LogEvent.NO_VALID_FORWARD: WARNING,
+    LogEvent.TOOK: INFO,
+    LogEvent.TOOK_CARDS: INFO,
+    LogEvent.BURNED: INFO,
+    LogEvent.DREW: DEBUG,
+    LogEvent.WON: INFO,
+}
+
+_LOG_EVENT_TEXTS: Dict[LogEvent, Callable[..., str]] = {
+    LogEvent.ATTACKED: lambda p, cards: f"Player {p} attacked with {cards_to_strs(cards)}",
+    LogEvent.FORCED_ATTACK: lambda p, card: f"Player {p} attacked with {cards_to_strs([card])} (forced random)",
+    LogEvent.INVALID_FIRST_ATTACK: lambda card: f"Invalid first attack action. Forcing attack with random card from hand: {CARD_TUPLES[card]}",
+    LogEvent.ATTACK_ERROR: lambda name, e: f"Bot {name} raised an exception during attack: {e}. Passing.\n",
+    LogEvent.PASSED: lambda p: f"Unsuccessful attack. Player {p} passes",
+    LogEvent.DEFENDED: lambda p, cards: f"Player {p} defended with {cards_to_strs(cards)}",
+    LogEvent.DEFENCE_ERROR: lambda p, e: f"Error in defence of player {p}: {e}",
+    LogEvent.INVALID_DEFENCE: lambda action: f"Invalid defence action: {action}. Taking cards.",
+    LogEvent.FORWARDED: lambda p, cards: f"Player {p} forwarded cards {cards_to_strs(cards)}",
+    LogEvent.NO_VALID_FORWARD: lambda: "No valid forwarding cards, taking cards",
+    LogEvent.TOOK: lambda p: f"Player {p} took cards",
+    LogEvent.TOOK_CARDS: lambda p, cards: f"Player {p} took cards: {cards_to_strs(cards)}",
+    LogEvent.BURNED: lambda p, cards: f"Player {p} burned cards: {cards_to_strs(cards)}",
+    LogEvent.DREW: lambda p, cards: f"Player {p} drew cards: {cards_to_strs(cards)}",
+    LogEvent.WON: lambda p: f"Player {p} has WON!",
+}
+
+
+def format_record(record: Union[LogRecord, str]) -> str:
+    """The text of a log record. Text entries (e.g. from bots that don't use AbstractBot)
+    are returned as they are."""
+    if isinstance(record, str):
+        return record
+    ts, source, event, args = record
+    if source == ENGINE_SOURCE:
+        return f"[TS:{ts}]Game: {_LOG_EVENT_TEXTS[event](*args)}"
+    try:
+        text = event % args if args else event
+    except (TypeError, ValueError):  # e.g. a stray "%" or the wrong number of args
+        text = f"{event} {args!r}"
+    return f"[TS:{ts}]Bot {source}: {text}"
+
+
+def format_log(records: Iterable[Union[LogRecord, str]]) -> List[str]:
+    return [format_record(record) for record in records]
+
+
+class BotLog:
+    """The log records of one bot, numbered from 0 in the order they were added.
+    Only the last `capacity` records are kept. total is the number of records added so
+    far, so it is also the cursor of the next one."""
+
+    __slots__ = ("records", "total", "unsaved")
+
+    def __init__(
+        self,
+        records: Iterable[Union[LogRecord, str]] = (),
+        total: Optional[int] = None,
+        capacity: int = LOG_BUFFER_SIZE,
+    ):
+        self.records: deque = deque(records, maxlen=capacity)
+        self.total: int = len(self.records) if total is None else total
+        # Records not yet taken by take_unsaved, None unless start_saving was called
+        self.unsaved: Optional[List[Union[LogRecord, str]]] = None
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[Union[LogRecord, str]]:
+        return iter(self.records)
+
+    @property
+    def first(self) -> int:
+        """The number of the oldest record still kept."""
+        return self.total - len(self.records)
+
+    def append(self, record: Union[LogRecord, str]) -> None:
+        self.records.append(record)
+        self.total += 1
+        if self.unsaved is not None:
+            self.unsaved.append(record)
+
+    def extend(self, records: List[Union[LogRecord, str]]) -> None:
+        self.records.extend(records)
+        self.total += len(records)
+        if self.unsaved is not None:
+            self.unsaved.extend(records)
+
+    def since(self, cursor: int) -> List[Union[LogRecord, str]]:
+        """The kept records numbered cursor and up."""
+        return list(islice(self.records, max(0, cursor - self.first), None))
+
+    def start_saving(self) -> None:
+        """Keeps every record added from now on until take_unsaved, e.g. for a log sink."""
+        self.unsaved = []
+
+    def take_unsaved(self) -> Tuple[int, List[Union[LogRecord, str]]]:
+        """The number of the first unsaved record and the unsaved records."""
+        records = self.unsaved or []
+        if self.unsaved is not None:
+            self.unsaved = []
+        return self.total - len(records), records
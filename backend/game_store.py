@@ -0,0 +1,157 @@
+# Bounded in-memory store for the API games.
+# Games are kept in LRU order and evicted when they have been idle for longer than the
+# TTL, or when the store holds too many games or (approximately) too many bytes.
+# Finished games can be spilled to disk on eviction and are loaded back on access.
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from durak_game import DurakState, is_game_over
+
+
+def _estimate_attributes_size(attributes: Dict[str, Any]) -> int:
+    return sum(64 * (len(value) if hasattr(value, "__len__") else 1) for value in attributes.values())
+
+
+def estimate_game_size(game: Dict[str, Any]) -> int:
+    # A rough estimate in bytes, cheap enough to recompute after every request
+    state: DurakState = game["state"]
+    size = 2048
+    for bot_log in state.log:
+        size += 160 * len(bot_log)  # Log records are only formatted when read
+    for bot_state in state.bot_states:
+        if isinstance(bot_state, dict):
+            size += _estimate_attributes_size(bot_state)
+    # Bots that persist_in_instance keep their state (e.g. the received events) there
+    for bot in game.get("bot_instances", []):
+        attributes = getattr(bot, "__dict__", None)
+        if attributes:
+            size += _estimate_attributes_size(attributes)
+    record = game.get("record")
+    if record is not None:
+        size += 128 * record.num_of_steps + 512 * len(record.checkpoints)
+    return size
+
+
+class GameStore:
+    def __init__(
+        self,
+        max_games: int,
+        max_bytes: int,
+        ttl: float,
+        spill_dir: Optional[str] = None,
+        on_evict: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        self.max_games = max_games
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.spill_dir = spill_dir
+        self.on_evict = on_evict
+        # game_id -> [game, size, last access time], least recently used first
+        self._games: "OrderedDict[str, list]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    def __contains__(self, game_id: str) -> bool:
+        return self.get(game_id) is not None
+
+    def __setitem__(self, game_id: str, game: Dict[str, Any]) -> None:
+        # Held by whoever advances the game, so its steps never run concurrently
+        game.setdefault("lock", threading.Lock())
+        with self._lock:
+            self._remove(game_id)
+            size = estimate_game_size(game)
+            self._games[game_id] = [game, size, time.monotonic()]
+            self._total_bytes += size
+            self._evict(keep=game_id)
+
+    def get(self, game_id: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._games.get(game_id)
+            if entry is None:
+                game = self._load_spilled(game_id)
+                if game is None:
+                    return default
+                self[game_id] = game
+                return game
+            entry[2] = time.monotonic()
+            self._games.move_to_end(game_id)
+            return entry[0]
+
+    def touch(self, game_id: str) -> None:
+        """Re-estimates the size of a game after it changed, evicting other games if needed."""
+        with self._lock:
+            entry = self._games.get(game_id)
+            if entry is None:
+                return
+            new_size = estimate_game_size(entry[0])
+            self._total_bytes += new_size - entry[1]
+            entry[1] = new_size
+            entry[2] = time.monotonic()
+            self._games.move_to_end(game_id)
+            self._evict(keep=game_id)
+
+    def pop(self, game_id: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._remove(game_id)
+            return default if entry is None else entry[0]
+
+    def _remove(self, game_id: str) -> Optional[list]:
+        entry = self._games.pop(game_id, None)
+        if entry is not None:
+            self._total_bytes -= entry[1]
+        return entry
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        now = time.monotonic()
+        while self._games:
+            game_id, (game, size, last_access) = next(iter(self._games.items()))
+            over_limits = len(self._games) > self.max_games or self._total_bytes > self.max_bytes
+            if game_id == keep or not (over_limits or now - last_access > self.ttl):
+                return
+            self._remove(game_id)
+            self._spill(game_id, game)
+            if self.on_evict is not None:
+                self.on_evict(game)
+
+    def _spill_path(self, game_id: str) -> str:
+        return os.path.join(self.spill_dir, f"{os.path.basename(game_id)}.json")
+
+    def _spill(self, game_id: str, game: Dict[str, Any]) -> None:
+        if self.spill_dir is None or not is_game_over(game["state"]):
+            return
+        try:
+            with open(self._spill_path(game_id), "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "bots": game["bots"],
+                        "bot_names": game["bot_names"],
+                        "state": game["state"].to_dict(),
+                    },
+                    f,
+                    default=str,
+                )
+        except Exception as e:
+            print(f"[GAME STORE] Failed to spill game {game_id}: {e}")
+
+    def _load_spilled(self, game_id: str) -> Optional[Dict[str, Any]]:
+        if self.spill_dir is None or not os.path.exists(self._spill_path(game_id)):
+            return None
+        with open(self._spill_path(game_id), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        # A finished game doesn't need its bots anymore
+        return {
+            "bots": data["bots"],
+            "bot_names": data["bot_names"],
+            "bot_instances": [],
+            "state": DurakState.from_dict(data["state"]),
+        }
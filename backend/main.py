@@ -6,30 +6,55 @@
 
 import os
 import uuid
-import importlib.util, importlib.machinery
 import sys
 import io
-import traceback
 
 # Add this before importing durak_game
 backend_dir = os.path.dirname(os.path.abspath(__file__))
 if backend_dir not in sys.path:
     sys.path.insert(0, backend_dir)
 
-from fastapi import FastAPI, UploadFile, Form, Request
+from fastapi import FastAPI, UploadFile, Form, Request, WebSocket, WebSocketDisconnect
 from fastapi.responses import FileResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from fastapi import status as fastapi_status
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel
 import random
+import asyncio
+import json
+import reprlib
 from configurations import (
-    SUITS,
-    RANKS,
-    CARDS_PER_HAND,
-    USE_FIXED_DECK,
+    FIXED_SEED,
+    MAX_NUM_OF_STEPS,
+    TOURNAMENT_WORKERS,
+    USE_BOT_WORKERS,
+    GAME_STORE_MAX_GAMES,
+    GAME_STORE_MAX_BYTES,
+    GAME_STORE_TTL,
+    GAME_STORE_SPILL_DIR,
+    DATABASE_PATH,
+    LOG_PAGE_SIZE,
+    BOT_STATE_DEBUG_MAX_BYTES,
 )
-from durak_game import pretty_print_state, card_str_to_tuple, advance_game_step
+from durak_game import (
+    pretty_print_state,
+    DurakState,
+    new_game,
+    advance_state,
+    is_game_over,
+    get_loser,
+    flush_all_events,
+)
+from bot_loader import load_bot, get_bot_name, invalidate_bot, file_digest
+from runner import run_tournament as run_bot_tournament, CycleDetector
+from tournament_jobs import TournamentJob, prune_jobs
+from bot_workers import BotWorker
+from game_store import GameStore
+from storage import GameDatabase
+from replay import GameRecord
+from game_log import format_record
 
 app = FastAPI()
 app.add_middleware(
@@ -41,7 +66,20 @@ app.add_middleware(
 
 # Set BOTS_DIR to the absolute path of the backend/bots directory
 BOTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bots")
-GAMES = {}
+GAMES = GameStore(
+    GAME_STORE_MAX_GAMES,
+    GAME_STORE_MAX_BYTES,
+    GAME_STORE_TTL,
+    spill_dir=GAME_STORE_SPILL_DIR,
+    on_evict=lambda game: close_game_bots(game),
+)
+TOURNAMENT_JOBS = {}
+# Games, moves and tournament results are also recorded here, see storage.py
+DB = (
+    GameDatabase(os.path.join(backend_dir, DATABASE_PATH))
+    if DATABASE_PATH is not None
+    else None
+)
 
 os.makedirs(BOTS_DIR, exist_ok=True)
 
@@ -57,54 +95,34 @@ class GameState(BaseModel):
     state: dict
 
 
-def create_deck():
-    deck = [{"rank": r, "suit": s} for s in SUITS for r in RANKS]
-    random.shuffle(deck)
-    return deck
-
-
-def shuffle(deck):
-    random.shuffle(deck)
-    return deck
-
-
-def deal_players(deck, num_players):
-    hands = [[] for _ in range(num_players)]
-    for i in range(CARDS_PER_HAND):
-        for j in range(num_players):
-            if deck:
-                hands[j].append(deck.pop(0))
-    return hands
-
-
-def load_bot(filepath):
-    # Ensure backend dir is in sys.path for bot imports
-    backend_dir = os.path.dirname(os.path.abspath(__file__))
-    if backend_dir not in sys.path:
-        sys.path.insert(0, backend_dir)
-    if not os.path.exists(filepath):
-        raise FileNotFoundError(f"Bot file not found: {filepath}")
-    module_name = os.path.splitext(os.path.basename(filepath))[0]
-    if filepath.endswith(".py"):
-        spec = importlib.util.spec_from_file_location(module_name, filepath)
-    elif filepath.endswith(".pyc"):
-        loader = importlib.machinery.SourcelessFileLoader(module_name, filepath)
-        spec = importlib.util.spec_from_loader(module_name, loader)
-    else:
-        raise ImportError(f"Unsupported file type for bot file: {filepath}")
-    if spec is None or spec.loader is None:
-        raise ImportError(f"Could not load spec for bot file: {filepath}")
-    try:
-        module = importlib.util.module_from_spec(spec)
-        sys.modules[module_name] = module
-        spec.loader.exec_module(module)
-        # Try to get 'bot' instance, else fallback to module
-        bot_instance = getattr(module, "bot", module)
-        return bot_instance
-    except Exception as e:
-        print(f"[ERROR] Failed to load bot from {filepath}: {e}")
-        traceback.print_exc()
-        return None
+class AdvanceResult(GameState):
+    steps: int  # Number of steps actually played
+    game_over: bool
+    moves: List[dict]  # Move.to_dict() of every step played, in order
+
+
+class ReplayState(GameState):
+    step: int  # The state is the game after this many steps
+    num_of_steps: int  # Steps recorded so far
+
+
+class LogEntry(BaseModel):
+    seq: int  # Number of the record in the bot's log
+    text: str
+
+
+class LogPage(BaseModel):
+    bot: int
+    entries: List[LogEntry]
+    next: int  # Cursor of the next page (the `after` of the next request)
+    total: int  # Records logged so far
+
+
+class BotStateDebug(BaseModel):
+    bot: int
+    state: str  # JSON of the bot state the engine keeps (values that aren't JSON as repr)
+    instance: Optional[str]  # The same for the attributes of the bot instance, if in-process
+    truncated: bool  # Whether state or instance was cut at BOT_STATE_DEBUG_MAX_BYTES
 
 
 @app.get("/api/bots", response_model=List[BotInfo])
@@ -140,6 +158,7 @@ async def upload_bot(file: UploadFile, name: str = Form(...)):
         )
         with open(filepath, "wb") as f:
             f.write(file_content)
+        invalidate_bot(filepath)
         # Save the display name in a .name file
         name_file = os.path.splitext(filepath)[0] + ".name"
         with open(name_file, "w", encoding="utf-8") as f:
@@ -169,6 +188,7 @@ def delete_bot(filename: str):
     filepath = os.path.join(BOTS_DIR, filename)
     name_file = os.path.splitext(filepath)[0] + ".name"
     try:
+        invalidate_bot(filepath)
         if os.path.exists(filepath):
             os.remove(filepath)
         if os.path.exists(name_file):
@@ -180,106 +200,311 @@ def delete_bot(filename: str):
         )
 
 
-def create_game_state(num_bots):
-    deck = shuffle(create_deck())
-    if USE_FIXED_DECK:
-        try:
-            with open("deck.txt","r") as f:
-                deck_str = f.read()
-                deck = [tuple([int(x) for x in s.split(",")]) for s in deck_str.split()]
-                deck = [{"rank": RANKS[c[0]], "suit": SUITS[c[1]]} for c in deck]
-        except Exception as e:
-            pass
-
-    with open("deck.txt", "w") as file:
-        for c in deck:
-            r, s = card_str_to_tuple(f"{c['rank']}{c['suit']}")
-            file.write(f"{r},{s} ")
-    trump_card_obj = deck[-1]
-    trump_card = f"{trump_card_obj['rank']}{trump_card_obj['suit']}"
-    trump_suit = trump_card_obj["suit"]
-    hands = deal_players(deck, num_bots)
-    # Find attacker: player with the lowest trump card (lowest rank of trump suit)
-    lowest_trump = 20
-    attacker = random.randint(0, num_bots - 1)
-    trump_rank_order = RANKS
-    for i, hand in enumerate(hands):
-        trump_cards = [
-            trump_rank_order.index(c["rank"]) for c in hand if c["suit"] == trump_suit
-        ]
-        if trump_cards:
-            min_trump = min(trump_cards)
-            if min_trump < lowest_trump:
-                lowest_trump = min_trump
-                attacker = i
-    if lowest_trump > len(trump_rank_order):
-        lowest_trump = -1
-    defender = (attacker + 1) % num_bots
-    return {
-        "trump_suit": trump_suit,
-        "trump_card": trump_card,  # always a string like '7♠'
-        "lowest_trump": lowest_trump,  # if there is no trump, it is marked as -1.
-        "hands": [[f"{c['rank']}{c['suit']}" for c in h] for h in hands],
-        "table_attack": [],
-        "table_defence": [],
-        "attacker": attacker,
-        "defender": defender,
-        "curr_player": attacker,
-        "log": [[] for _ in range(num_bots)],  # log is now a list of lists, one per bot
-        "bot_states": [{} for _ in range(num_bots)],
-        "burn": False,
-        "num_of_burned_cards": 0,
-        "deck": [f"{c['rank']}{c['suit']}" for c in deck],
-        "deck_count": len(deck),  # Add deck count to state
-    }
+def record_bot_versions(bot_paths: List[str], bot_names: List[str]) -> List[str]:
+    # The digests identifying the bot versions in the database
+    digests = [file_digest(path) for path in bot_paths]
+    for digest, path, name in zip(digests, bot_paths, bot_names):
+        DB.record_bot_version(digest, os.path.basename(path), name)
+    return digests
+
+
+def close_game_bots(game):
+    # Stops the worker processes of a game that uses USE_BOT_WORKERS
+    for bot in game["bot_instances"]:
+        if isinstance(bot, BotWorker):
+            bot.close()
+
+
+def get_new_game_seed() -> int:
+    return FIXED_SEED if FIXED_SEED is not None else random.randrange(2**32)
+
+
+def create_game_state(num_bots: int, seed: int) -> DurakState:
+    # The whole game (deal, first attacker and forced attacks) is reproducible from seed
+    return new_game(num_bots, random.Random(seed))
 
 
 @app.post("/api/games", response_model=GameState)
-async def create_game(request: Request):
+async def create_game(request: Request, seed: Optional[int] = None):
     bot_filenames = await request.json()
     bots = []
     bot_names = []
+    bot_paths = [os.path.join(BOTS_DIR, fname) for fname in bot_filenames]
     for fname in bot_filenames:
         bot_path = os.path.join(BOTS_DIR, fname)
-        bot_instance = load_bot(bot_path)
+        if USE_BOT_WORKERS:
+            bot_instance = BotWorker(bot_path).start()
+        else:
+            bot_instance = load_bot(bot_path)
         bots.append(bot_instance)
-        # Use bot.name if available, else fallback to .name file, else fallback to filename
-        bot_name = getattr(bot_instance, "name", None)
-        if not bot_name:
-            name_file = os.path.splitext(bot_path)[0] + ".name"
-            if os.path.exists(name_file):
-                with open(name_file, "r", encoding="utf-8") as f:
-                    bot_name = f.read().strip()
-        if not bot_name:
-            bot_name = fname.split("_", 1)[-1].replace(".pyc", "").replace(".py", "")
-        bot_names.append(bot_name)
-    state = create_game_state(len(bot_filenames))
+        bot_names.append(get_bot_name(bot_instance, bot_path))
+    if seed is None:
+        seed = get_new_game_seed()
+    durak_state = create_game_state(len(bot_filenames), seed)
+    state = durak_state.to_dict()
     # Pretty print the initial state for debugging
     pretty_print_state(state)
     game_id = uuid.uuid4().hex
-    GAMES[game_id] = {"bots": bot_filenames, "bot_names": bot_names, "state": state}
+    record = GameRecord.start(durak_state)
+    # The game is kept as a DurakState, the dict is only built for responses.
+    # Its bot instances are cloned once from the bot cache and kept for the whole game.
+    GAMES[game_id] = {
+        "bots": bot_filenames,
+        "bot_names": bot_names,
+        "bot_instances": bots,
+        "state": durak_state,
+        "num_of_steps": 0,
+        "record": record,
+        "seed": seed,
+    }
+    if DB is not None:
+        # The full logs go to the database, the state only keeps the last ones
+        for bot_log in durak_state.log:
+            bot_log.start_saving()
+        DB.record_game_start(
+            game_id, record_bot_versions(bot_paths, bot_names), state, seed=str(seed)
+        )
+        DB.record_checkpoint(game_id, 0, {**record.checkpoints[0], "deck": record.deck})
     return GameState(id=game_id, bots=bot_names, state=state)
 
 
+def find_game(game_id: str):
+    # Finished games that are no longer in memory (e.g. after a restart) come from the DB
+    game = GAMES.get(game_id)
+    if game is None and DB is not None:
+        game = DB.load_finished_game(game_id)
+        if game is not None:
+            GAMES[game_id] = game
+    return game
+
+
+def play_step(game_id: str, game) -> None:
+    # The caller holds game["lock"]
+    state = game["state"]
+    # Pass bot_names for display
+    advance_state(state, game["bot_instances"], game.get("bot_names", []))
+    game["num_of_steps"] = game.get("num_of_steps", 0) + 1
+    checkpoint = game["record"].add_step(state) if "record" in game else None
+    if DB is not None:
+        DB.record_move(game_id, game["num_of_steps"], state.last_move)
+        for bot, bot_log in enumerate(state.log):
+            DB.record_logs(game_id, bot, *bot_log.take_unsaved())
+        if checkpoint is not None:
+            DB.record_checkpoint(game_id, game["num_of_steps"], checkpoint)
+    if is_game_over(state):
+        close_game_bots(game)
+        if DB is not None:
+            DB.record_game_end(
+                game_id, get_loser(state), game["num_of_steps"], state.to_dict()
+            )
+
+
 @app.get("/api/games/{game_id}", response_model=GameState)
 def get_game(game_id: str):
-    game = GAMES.get(game_id)
+    game = find_game(game_id)
     if not game:
         return {"error": "Game not found"}
-    return GameState(id=game_id, bots=game["bots"], state=game["state"])
+    return GameState(id=game_id, bots=game["bots"], state=game["state"].to_dict())
 
 
 @app.post("/api/games/{game_id}/step", response_model=GameState)
-async def step_game(game_id: str):
+def step_game(game_id: str):
+    game = find_game(game_id)
+    if not game:
+        return JSONResponse({"error": "Game not found"}, status_code=404)
+    with game["lock"]:
+        if not is_game_over(game["state"]):
+            play_step(game_id, game)
+    GAMES.touch(game_id)
+    return GameState(
+        id=game_id, bots=game.get("bot_names", []), state=game["state"].to_dict()
+    )
+
+
+@app.post("/api/games/{game_id}/advance", response_model=AdvanceResult)
+def advance_game(game_id: str, steps: int = 1, to_end: bool = False):
+    # Plays many steps in one request, at most MAX_NUM_OF_STEPS. With to_end the game
+    # runs until it is over (or MAX_NUM_OF_STEPS more steps were played).
+    # Other requests can't step the game in the middle of the batch.
+    game = find_game(game_id)
+    if not game:
+        return JSONResponse({"error": "Game not found"}, status_code=404)
+    state = game["state"]
+    max_steps = MAX_NUM_OF_STEPS if to_end else min(max(0, steps), MAX_NUM_OF_STEPS)
+    moves = []
+    with game["lock"]:
+        while len(moves) < max_steps and not is_game_over(state):
+            play_step(game_id, game)
+            moves.append(state.last_move.to_dict())
+    GAMES.touch(game_id)
+    return AdvanceResult(
+        id=game_id,
+        bots=game.get("bot_names", []),
+        state=state.to_dict(),
+        steps=len(moves),
+        game_over=is_game_over(state),
+        moves=moves,
+    )
+
+
+@app.get("/api/games/{game_id}/replay", response_model=ReplayState)
+def replay_game(game_id: str, step: int = 0):
+    # The game after `step` steps, rebuilt from the game record without running any bot
     game = GAMES.get(game_id)
+    record = game.get("record") if game else None
+    if record is None and DB is not None:
+        record = DB.load_record(game_id)
+    if record is None:
+        return JSONResponse({"error": "Game not found"}, status_code=404)
+    state = record.state_at(step)
+    return ReplayState(
+        id=game_id,
+        bots=game.get("bot_names", []) if game else [],
+        state=state.to_dict(),
+        step=max(0, min(step, record.num_of_steps)),
+        num_of_steps=record.num_of_steps,
+    )
+
+
+@app.get("/api/games/{game_id}/logs", response_model=LogPage)
+def get_game_logs(game_id: str, bot: int, after: int = 0, limit: int = LOG_PAGE_SIZE):
+    # The log of a bot from record `after` on. The state only holds the last records,
+    # older ones come from the database (or are gone without it).
+    game = find_game(game_id)
     if not game:
         return JSONResponse({"error": "Game not found"}, status_code=404)
-    bots = [load_bot(os.path.join(BOTS_DIR, fname)) for fname in game["bots"]]
     state = game["state"]
-    # Pass bot_names for display
-    new_state = advance_game_step(state, bots, game.get("bot_names", []))
-    game["state"] = new_state
-    return GameState(id=game_id, bots=game.get("bot_names", []), state=new_state)
+    if not 0 <= bot < len(state.log):
+        return JSONResponse({"error": "Bot not found"}, status_code=404)
+    bot_log = state.log[bot]
+    limit = max(0, min(limit, LOG_PAGE_SIZE))
+    after = max(0, after)
+    entries = []
+    if after < bot_log.first and DB is not None:
+        # The records can still be queued for the database
+        DB.flush()
+        entries = DB.load_logs(game_id, bot, after, limit)
+    if not entries:
+        after = max(after, bot_log.first)
+        entries = [
+            {"seq": seq, "text": format_record(record)}
+            for seq, record in enumerate(bot_log.since(after)[:limit], start=after)
+        ]
+    return LogPage(
+        bot=bot,
+        entries=entries,
+        next=entries[-1]["seq"] + 1 if entries else after,
+        total=bot_log.total,
+    )
+
+
+# A bounded repr for values that aren't JSON (e.g. dicts with tuple keys)
+_preview_repr = reprlib.Repr()
+_preview_repr.maxlevel = 8
+_preview_repr.maxdict = _preview_repr.maxlist = _preview_repr.maxtuple = 1000
+_preview_repr.maxset = _preview_repr.maxfrozenset = _preview_repr.maxdeque = 1000
+_preview_repr.maxstring = _preview_repr.maxother = 1000
+
+
+def preview_value(value, max_bytes: int):
+    # Text of value for debugging, cut to max_bytes characters, and whether it was cut.
+    # The JSON is built piece by piece and only until max_bytes, not for the whole value.
+    chunks = []
+    size = 0
+    try:
+        for chunk in json.JSONEncoder(default=repr).iterencode(value):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > max_bytes:
+                break
+        text = "".join(chunks)
+    except (TypeError, ValueError):  # e.g. a tuple key or a circular reference
+        text = _preview_repr.repr(value)
+    return text[:max_bytes], len(text) > max_bytes
+
+
+def get_instance_attributes(instance) -> dict:
+    # The attributes of a bot instance, also for classes with __slots__
+    attributes = dict(getattr(instance, "__dict__", None) or {})
+    for cls in type(instance).__mro__:
+        slots = getattr(cls, "__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name in ("__dict__", "__weakref__"):
+                continue
+            if name.startswith("__") and not name.endswith("__"):
+                name = f"_{cls.__name__.lstrip('_')}{name}"  # Mangled private slot
+            if hasattr(instance, name):
+                attributes[name] = getattr(instance, name)
+    return attributes
+
+
+@app.get("/api/games/{game_id}/bot_states", response_model=BotStateDebug)
+def get_bot_state(game_id: str, bot: int, max_bytes: int = BOT_STATE_DEBUG_MAX_BYTES):
+    # Bot states are never part of the game state responses, this is for debugging bots
+    game = find_game(game_id)
+    if not game:
+        return JSONResponse({"error": "Game not found"}, status_code=404)
+    state = game["state"]
+    if not 0 <= bot < len(state.bot_states):
+        return JSONResponse({"error": "Bot not found"}, status_code=404)
+    max_bytes = max(0, min(max_bytes, BOT_STATE_DEBUG_MAX_BYTES))
+    text, truncated = preview_value(state.bot_states[bot], max_bytes)
+    instance = None
+    instances = game.get("bot_instances", [])
+    if bot < len(instances) and not isinstance(instances[bot], BotWorker):
+        instance, instance_truncated = preview_value(
+            get_instance_attributes(instances[bot]), max_bytes
+        )
+        truncated = truncated or instance_truncated
+    return BotStateDebug(bot=bot, state=text, instance=instance, truncated=truncated)
+
+
+def stream_step(game_id: str, game):
+    # Plays one step and returns what it changed, None if the game is already over
+    state = game["state"]
+    with game["lock"]:
+        if is_game_over(state):
+            return None
+        snapshot = state.snapshot()
+        play_step(game_id, game)
+        return state.delta_since(snapshot)
+
+
+@app.websocket("/api/games/{game_id}/stream")
+async def stream_game(websocket: WebSocket, game_id: str, delay_ms: int = 200):
+    # Plays the game server-side and pushes one delta per step (see DurakState.delta_since)
+    # instead of the client polling /step and receiving the whole state every time.
+    await websocket.accept()
+    game = find_game(game_id)
+    if not game:
+        await websocket.send_json({"error": "Game not found"})
+        await websocket.close()
+        return
+    state = game["state"]
+    step = 0
+    # Pending while the client is connected, so the game stops as soon as it leaves
+    receiver = asyncio.ensure_future(websocket.receive())
+    try:
+        while True:
+            delta = await run_in_threadpool(stream_step, game_id, game)
+            if delta is None:
+                break
+            step += 1
+            delta["step"] = step
+            delta["game_over"] = is_game_over(state)
+            await websocket.send_json(delta)
+            done, _ = await asyncio.wait({receiver}, timeout=delay_ms / 1000)
+            if receiver in done:
+                if receiver.result()["type"] == "websocket.disconnect":
+                    return
+                # Messages from the client are ignored
+                receiver = asyncio.ensure_future(websocket.receive())
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        GAMES.touch(game_id)
 
 
 max_steps_achieved = 0
@@ -291,8 +516,6 @@ def main(to_print: bool = False, randomize_order: bool = False):
     import argparse
     import time
 
-    MAX_NUM_OF_STEPS = 700  # Limit to prevent infinite loops
-
     parser = argparse.ArgumentParser(description="Run Durak game in CLI mode (no UI).")
     parser.add_argument(
         "bots", nargs="+", help="List of bot .py files (from backend/bots/)"
@@ -305,32 +528,25 @@ def main(to_print: bool = False, randomize_order: bool = False):
     bot_filenames = args.bots
     bot_paths = [os.path.join(BOTS_DIR, fname) for fname in bot_filenames]
     bots = [load_bot(path) for path in bot_paths]
-    bot_names = []
-    for bot_instance, fname in zip(bots, bot_filenames):
-        bot_name = getattr(bot_instance, "name", None)
-        if not bot_name:
-            name_file = os.path.splitext(os.path.join(BOTS_DIR, fname))[0] + ".name"
-            if os.path.exists(name_file):
-                with open(name_file, "r", encoding="utf-8") as f:
-                    bot_name = f.read().strip()
-        if not bot_name:
-            bot_name = fname.split("_", 1)[-1].replace(".pyc", "").replace(".py", "")
-        bot_names.append(bot_name)
+    bot_names = [get_bot_name(bot, path) for bot, path in zip(bots, bot_paths)]
 
     bot_names = [f"Player {i}: {bot_names[i]}" for i in range(len(bot_names))]
 
-    state = create_game_state(len(bot_filenames))
+    game = create_game_state(len(bot_filenames), get_new_game_seed())
 
     if to_print:
+        state = game.to_dict()
         print("=== Durak CLI Game ===")
         print(f"Trump card: {state['trump_card']}")
         print(f"Trump suit: {state['trump_suit']}")
         print(f"Bots: {bot_names}")
         print("Starting game...\n")
 
+    cycle_detector = CycleDetector()
     step = 0
     while True:
         if to_print:
+            state = game.to_dict()
             print(f"\n--- Step {step} ---")
             print(
                 f"Attacker: {bot_names[state['attacker']]} | Defender: {bot_names[state['defender']]}"
@@ -345,23 +561,20 @@ def main(to_print: bool = False, randomize_order: bool = False):
                     print(f"Log [{bot_names[idx]}]: {bot_log[-1]}")
         # Check for game end
         # A player is only out if their hand is empty AND the deck is empty
-        alive = [
-            i
-            for i, h in enumerate(state["hands"])
-            if len(h) > 0 or len(state["deck"]) > 0
-        ]
+        alive = [i for i, h in enumerate(game.hands) if h or game.deck_count > 0]
         if len(alive) <= 1 or step >= MAX_NUM_OF_STEPS:
             if to_print:
                 print("\n=== GAME OVER ===")
             # Print all winners
             if step == MAX_NUM_OF_STEPS:
+                flush_all_events(game, bots)
                 if to_print:
                     print("Game ended due to reaching max steps.\nNo one loses.")
                 return -1  # Indicate game ended without a loser
             else:
                 max_steps_achieved = max(max_steps_achieved, step)
-                for idx, h in enumerate(state["hands"]):
-                    if len(h) == 0:
+                for idx, h in enumerate(game.hands):
+                    if not h:
                         if to_print:
                             print(f"WINNER: {bot_names[idx]}")
                 # Print the loser (the only one with cards left)
@@ -370,92 +583,142 @@ def main(to_print: bool = False, randomize_order: bool = False):
                         print(f"\nLOSER: {bot_names[alive[0]]}")
                     return alive[0]  # Return the index of the loser
         # Advance game step
-        state = advance_game_step(state, bots, bot_names)
+        advance_state(game, bots, bot_names)
         step += 1
+        if cycle_detector.is_stuck(game):
+            flush_all_events(game, bots)
+            if to_print:
+                print("\n=== GAME OVER ===\nGame stopped making progress.\nNo one loses.")
+            return -1
 
 
-def tournament(num_of_games=10, to_print=False):
-    loser_count_lst = [0 for _ in range(len(sys.argv) - 1)]
-    count_proper_games = 0
-    max_total_games = 2 * num_of_games
-    game_idx = 0
-    bot_filenames_orig = sys.argv[1:]  # Save original order
-    while count_proper_games < num_of_games and game_idx < max_total_games:
-        if to_print:
-            print(f"Game {game_idx + 1} of {num_of_games}:")
-
-        # Randomize player order for this game
-        bot_filenames = bot_filenames_orig[:]
-        random.shuffle(bot_filenames)
-        sys.argv = ["main.py"] + bot_filenames
-        loser = main(to_print=False)
-        # `sys.stdout = sys.__stdout__
-        if loser != -1:
-            if to_print:
-                print(f"Game {game_idx + 1} ended with loser: {loser}")
-            # Map loser index back to original bot order
-            orig_idx = bot_filenames_orig.index(bot_filenames[loser])
-            loser_count_lst[orig_idx] += 1
-            count_proper_games += 1
-        elif to_print:
-            print(f"Game {game_idx + 1} ended without a loser (max steps reached).")
-        game_idx += 1
+def tournament(num_of_games=10, to_print=False, num_of_workers=1):
+    global max_steps_achieved
+
+    bot_filenames = sys.argv[1:]
+    bot_paths = [os.path.join(BOTS_DIR, fname) for fname in bot_filenames]
+    result = run_bot_tournament(
+        bot_paths,
+        num_of_games=num_of_games,
+        to_print=to_print,
+        num_of_workers=num_of_workers,
+    )
+    if DB is not None:
+        bot_names = [get_bot_name(None, path) for path in bot_paths]
+        DB.record_tournament(
+            uuid.uuid4().hex,
+            record_bot_versions(bot_paths, bot_names),
+            "done",
+            num_of_games,
+            result,
+        )
+        DB.flush()
+    for game in result.games:
+        if game.result.loser != -1:
+            max_steps_achieved = max(max_steps_achieved, game.result.num_of_steps)
     print("\n=== Tournament Results ===")
-    for i, count in enumerate(loser_count_lst):
+    for i, count in enumerate(result.loser_count_lst):
         print(f"Player {i} lost {count} times.")
-    num_of_infinite_games = game_idx - count_proper_games
-    print(f"\n{num_of_infinite_games} games got caught in an infinite loop.")
+    print(f"\n{result.num_of_infinite_games} games got caught in an infinite loop.")
 
-    return loser_count_lst, num_of_infinite_games
+    return result.loser_count_lst, result.num_of_infinite_games
 
 
-@app.post("/api/tournament")
-async def run_tournament(request: Request):
-    data = await request.json()
-    bot_filenames = data.get("bots", [])
-    num_games = int(data.get("numGames", 10))
+def check_tournament_bots(bot_filenames: List[str]) -> Optional[JSONResponse]:
+    # The error response for bots a tournament can't run with, None if they are fine
     if len(bot_filenames) < 2:
         return JSONResponse({"error": "At least 2 bots required"}, status_code=400)
-    # Prepare sys.argv for tournament
-    sys_argv_backup = sys.argv
-    sys.argv = ["main.py"] + bot_filenames
-    # Redirect stdout to capture tournament output
-    # old_stdout = sys.stdout
-    # stdout_capture = io.StringIO()
-    # sys.stdout = stdout_capture
-    try:
-        loser_count_lst, num_of_infinite_games = tournament(
-            num_of_games=num_games, to_print=True
+    missing = [
+        fname for fname in bot_filenames if not os.path.isfile(os.path.join(BOTS_DIR, fname))
+    ]
+    if missing:
+        return JSONResponse({"error": f"Bots not found: {', '.join(missing)}"}, status_code=400)
+    return None
+
+
+def start_tournament_job(data: dict) -> TournamentJob:
+    bot_filenames = data.get("bots", [])
+    bot_paths = [os.path.join(BOTS_DIR, fname) for fname in bot_filenames]
+    on_finish = None
+    if DB is not None:
+        bot_digests = record_bot_versions(
+            bot_paths, [get_bot_name(None, path) for path in bot_paths]
         )
-        # output = stdout_capture.getvalue()
-    except Exception as e:
-        # sys.stdout = old_stdout
-        # sys.argv = sys_argv_backup
-        return JSONResponse({"error": str(e)}, status_code=500)
-    # sys.stdout = old_stdout
-    sys.argv = sys_argv_backup
-    # Count infinite games from output
-    # infinite_games = 0
-    # total_games = num_games
-    # for line in output.splitlines():
-    #     if "infinite loop" in line:
-    #         try:
-    #             infinite_games = int(line.split()[0])
-    #         except Exception:
-    #             pass
+
+        def on_finish(job: TournamentJob) -> None:
+            DB.record_tournament(
+                job.id, bot_digests, job.status, job.num_of_games, job.result
+            )
+
+    job = TournamentJob(
+        bot_paths,
+        num_of_games=int(data.get("numGames", 10)),
+        num_of_workers=int(data.get("numWorkers", TOURNAMENT_WORKERS)),
+        on_finish=on_finish,
+    )
+    prune_jobs(TOURNAMENT_JOBS)
+    TOURNAMENT_JOBS[job.id] = job
+    return job.start()
+
+
+@app.post("/api/tournament")
+async def run_tournament(request: Request):
+    data = await request.json()
+    error = check_tournament_bots(data.get("bots", []))
+    if error is not None:
+        return error
+    job = start_tournament_job(data)
+    # Wait for the job on a worker thread, the event loop keeps serving other requests
+    await run_in_threadpool(job.wait)
+    result = job.to_dict()
+    if job.status == "error":
+        return JSONResponse({"error": result["error"]}, status_code=500)
     return {
-        "loser_count_lst": loser_count_lst,
-        "total_games": sum(loser_count_lst) + num_of_infinite_games,
-        "infinite_games": num_of_infinite_games,
-        # "output": output,
+        "loser_count_lst": result["loser_count_lst"],
+        "total_games": result["total_games"],
+        "infinite_games": result["infinite_games"],
     }
 
 
+@app.post("/api/tournaments")
+async def submit_tournament(request: Request):
+    data = await request.json()
+    error = check_tournament_bots(data.get("bots", []))
+    if error is not None:
+        return error
+    return start_tournament_job(data).to_dict()
+
+
+@app.get("/api/stats/bots")
+def get_bot_stats():
+    # Historical results of every bot version, from all recorded games and tournaments
+    if DB is None:
+        return JSONResponse({"error": "No database configured"}, status_code=404)
+    return DB.get_bot_stats()
+
+
+@app.get("/api/tournaments/{job_id}")
+def get_tournament(job_id: str):
+    job = TOURNAMENT_JOBS.get(job_id)
+    if not job:
+        return JSONResponse({"error": "Tournament not found"}, status_code=404)
+    return job.to_dict()
+
+
+@app.delete("/api/tournaments/{job_id}")
+def cancel_tournament(job_id: str):
+    job = TOURNAMENT_JOBS.get(job_id)
+    if not job:
+        return JSONResponse({"error": "Tournament not found"}, status_code=404)
+    job.cancel()
+    return job.to_dict()
+
+
 if __name__ == "__main__":
     import time
 
     start_time = time.time()
-    tournament(num_of_games=100)  # Run tournament with 100 games
+    tournament(num_of_games=100, num_of_workers=TOURNAMENT_WORKERS)  # Run tournament with 100 games
     end_time = time.time()
     print(f"Total time taken: {end_time - start_time:.2f} seconds")
     print(f"Max steps achieved in any game: {max_steps_achieved}")
@@ -0,0 +1,150 @@
+# Compact game records and bot-free replay.
+# A GameRecord holds the deck and starting position of a game, the Move of every step,
+# and a checkpoint of the game every REPLAY_CHECKPOINT_INTERVAL steps. Any step can be
+# rebuilt from the nearest checkpoint by re-applying the recorded moves with a
+# ScriptedBot in every seat, so no real bot code runs.
+# Checkpoints and replayed states leave out the bot logs and bot states.
+
+from typing import Any, Dict, List, Optional
+
+from configurations import REPLAY_CHECKPOINT_INTERVAL
+from cards import cards_to_tuples
+from durak_actions import Input_actions, Output_actions
+from durak_game import DurakState, Move, advance_state
+
+Checkpoint = Dict[str, Any]
+
+
+def get_checkpoint(game: DurakState) -> Checkpoint:
+    # Everything advance_state needs, except the deck (stored once per record)
+    return {
+        "hands": game.hands[:],
+        "table_attack": game.table_attack[:],
+        "table_defence": game.table_defence[:],
+        "attacker": game.attacker,
+        "defender": game.defender,
+        "curr_player": game.curr_player,
+        "deck_pos": game.deck_pos,
+        "trump_card": game.trump_card,
+        "lowest_trump": game.lowest_trump,
+        "burn": game.burn,
+        "num_of_burned_cards": game.num_of_burned_cards,
+        "status": game.status[:],
+        "did_game_init_occur": game.did_game_init_occur,
+    }
+
+
+def restore_checkpoint(checkpoint: Checkpoint, deck: List[int]) -> DurakState:
+    game = DurakState(
+        checkpoint["hands"][:],
+        deck,
+        checkpoint["trump_card"],
+        checkpoint["attacker"],
+        checkpoint["lowest_trump"],
+    )
+    game.table_attack = checkpoint["table_attack"][:]
+    game.table_defence = checkpoint["table_defence"][:]
+    game.defender = checkpoint["defender"]
+    game.curr_player = checkpoint["curr_player"]
+    game.deck_pos = checkpoint["deck_pos"]
+    game.burn = checkpoint["burn"]
+    game.num_of_burned_cards = checkpoint["num_of_burned_cards"]
+    game.status = checkpoint["status"][:]
+    game.did_game_init_occur = checkpoint["did_game_init_occur"]
+    game.rehash()
+    return game
+
+
+def move_to_action(move: Move) -> Optional[list]:
+    # The bot action that makes the engine play exactly this move
+    if move.action in ("attack", "forward"):
+        kind = Output_actions.ATTACK if move.action == "attack" else Output_actions.FORWARD
+        return [kind, cards_to_tuples(move.cards)]
+    if move.action == "defend":
+        return [Output_actions.DEFEND, cards_to_tuples(move.cards), list(move.indexes)]
+    if move.action == "take":
+        return [Output_actions.TAKE]
+    if move.action == "pass":
+        return [Output_actions.PASS]
+    return None  # "burn" doesn't ask a bot
+
+
+class ScriptedBot:
+    """Answers the engine's action requests with a preset action and ignores the rest."""
+
+    def __init__(self):
+        self.action: Optional[list] = None
+
+    def call(self, message, *args):
+        if message[0] in (
+            Input_actions.FIRST_ATTACK,
+            Input_actions.OPTIONAL_ATTACK,
+            Input_actions.DEFENCE,
+        ):
+            return self.action
+        return None
+
+
+def apply_moves(game: DurakState, moves: List[Move]) -> None:
+    """Replays recorded moves on game, in place."""
+    bot = ScriptedBot()
+    bots = [bot] * game.num_of_players
+    for move in moves:
+        bot.action = move_to_action(move)
+        advance_state(game, bots)
+
+
+class GameRecord:
+    def __init__(
+        self,
+        deck: List[int],
+        initial: Checkpoint,
+        checkpoint_interval: int = REPLAY_CHECKPOINT_INTERVAL,
+    ):
+        self.deck = deck
+        self.checkpoint_interval = checkpoint_interval
+        self.moves: List[Move] = []
+        # step -> checkpoint of the game after that many steps
+        self.checkpoints: Dict[int, Checkpoint] = {0: initial}
+
+    @classmethod
+    def start(cls, game: DurakState, checkpoint_interval: int = REPLAY_CHECKPOINT_INTERVAL):
+        return cls(game.deck[:], get_checkpoint(game), checkpoint_interval)
+
+    @property
+    def num_of_steps(self) -> int:
+        return len(self.moves)
+
+    def add_step(self, game: DurakState) -> Optional[Checkpoint]:
+        """Records the step game just played. Returns the new checkpoint, if one was taken."""
+        self.moves.append(game.last_move)
+        if self.num_of_steps % self.checkpoint_interval == 0:
+            checkpoint = get_checkpoint(game)
+            self.checkpoints[self.num_of_steps] = checkpoint
+            return checkpoint
+        return None
+
+    def state_at(self, step: int) -> DurakState:
+        """The game after `step` steps (clamped to the recorded steps)."""
+        step = max(0, min(step, self.num_of_steps))
+        checkpoint_step = max(s for s in self.checkpoints if s <= step)
+        game = restore_checkpoint(self.checkpoints[checkpoint_step], self.deck)
+        apply_moves(game, self.moves[checkpoint_step:step])
+        return game
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Moves are stored as [player, action, cards, indexes]
+        return {
+            "deck": self.deck,
+            "checkpoint_interval": self.checkpoint_interval,
+            "moves": [[m.player, m.action, list(m.cards), list(m.indexes)] for m in self.moves],
+            "checkpoints": self.checkpoints,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GameRecord":
+        checkpoints = {int(step): cp for step, cp in data["checkpoints"].items()}
+        record = cls(data["deck"], checkpoints[0], data["checkpoint_interval"])
+        record.checkpoints = checkpoints
+        record.moves = [Move(p, a, cards, tuple(indexes)) for p, a, cards, indexes in data["moves"]]
+        return record
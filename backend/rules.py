@@ -0,0 +1,244 @@
+# Bot-free rules API for search-based bots (lookahead, MCTS, ...).
+# legal_actions lists the moves the current player can make, and apply plays one on a
+# DurakState exactly as advance_state would, but without calling or informing bots and
+# without writing logs. Simulate on DurakState.clone() to keep the real game intact.
+# Actions are Moves, the same type the engine records for every step. Like advance_state,
+# apply keeps game.zobrist_hash up to date, so searches can key a zobrist.TranspositionTable
+# by it.
+
+from itertools import combinations
+from typing import Dict, List, Optional
+
+from configurations import (
+    CARDS_PER_HAND,
+    STARTING_MAX_ATTACK_SIZE,
+    MAX_ATTACK_SIZE_AFTER_BURN,
+)
+from cards import BEATS, RANK_MASKS, mask_to_cards
+from zobrist import hash_snapshot, update_hash
+from durak_game import (
+    DurakState,
+    Move,
+    attack_vector,
+    attack_with_card_list,
+    defend_with_card_list,
+    forward_with_card_list,
+    get_next_player,
+    prepare_table,
+    real_cards,
+)
+
+
+def _rank_subsets(cards: List[int], max_size: int) -> List[List[int]]:
+    # Non-empty subsets of same-rank cards, at most max_size cards each
+    return [
+        list(subset)
+        for size in range(1, min(len(cards), max_size) + 1)
+        for subset in combinations(cards, size)
+    ]
+
+
+def _num_of_free_slots(game: DurakState) -> int:
+    # Free attack slots once the table is prepared for the step (see prepare_table)
+    max_attack_size = min(
+        game.hands[game.defender].bit_count(),
+        MAX_ATTACK_SIZE_AFTER_BURN if game.burn else STARTING_MAX_ATTACK_SIZE,
+    )
+    attacks = real_cards(game.table_attack)
+    table_size = max_attack_size if not attacks else max(len(game.table_attack), max_attack_size)
+    return table_size - len(attacks)
+
+
+def legal_actions(game: DurakState, player: int) -> List[Move]:
+    """The moves player can make in this step (none if it isn't player's turn).
+
+    First attacks and forwards may play several cards of one rank at once and are listed
+    for every such set. Optional attacks and defences are listed one card at a time (the
+    turn comes back to the player, so each card can be added in a later step); apply
+    also accepts them with several cards."""
+    if player != game.curr_player:
+        return []
+    hand = game.hands[player]
+    attacks = real_cards(game.table_attack)
+    if player == game.defender:
+        table_attack, table_defence = game.table_attack, game.table_defence
+        undefended = [
+            index
+            for index, card in enumerate(table_attack)
+            if card is not None and (index >= len(table_defence) or table_defence[index] is None)
+        ]
+        if not undefended:
+            return [Move(player, "burn", real_cards(table_attack + table_defence))]
+        actions = [Move(player, "take", attacks + real_cards(table_defence))]
+        beats = BEATS[game.trump_suit]
+        for index in undefended:
+            for card in mask_to_cards(hand & beats[table_attack[index]]):
+                actions.append(Move(player, "defend", [card], (index,)))
+        num_of_allowed_forwarding_cards = (
+            game.hands[get_next_player(game, player)].bit_count() - len(attacks)
+        )
+        if not real_cards(table_defence) and num_of_allowed_forwarding_cards > 0:
+            for cards in _rank_subsets(
+                mask_to_cards(hand & RANK_MASKS[table_attack[0] >> 2]),
+                num_of_allowed_forwarding_cards,
+            ):
+                actions.append(Move(player, "forward", cards))
+        return actions
+    num_of_free_slots = _num_of_free_slots(game)
+    if not attacks:
+        cards_by_rank: Dict[int, List[int]] = {}
+        for card in mask_to_cards(hand):
+            cards_by_rank.setdefault(card >> 2, []).append(card)
+        return [
+            Move(player, "attack", cards)
+            for rank_cards in cards_by_rank.values()
+            for cards in _rank_subsets(rank_cards, num_of_free_slots)
+        ]
+    actions = [Move(player, "pass", [])]
+    if num_of_free_slots > 0:
+        allowed = hand & attack_vector(game.table_attack, game.table_defence)
+        actions.extend(Move(player, "attack", [card]) for card in mask_to_cards(allowed))
+    return actions
+
+
+def _take(game: DurakState) -> None:
+    cards = real_cards(game.table_attack + game.table_defence)
+    game.hands[game.defender] |= sum(1 << card for card in cards)
+    game.last_move = Move(game.defender, "take", cards)
+
+
+def _end_round(game: DurakState, is_defence_successful: bool) -> None:
+    hands = game.hands
+    curr_attacker = game.attacker
+    curr_defender = game.defender
+    # Draw in cyclic order from the attacker, the defender last
+    order = [
+        (curr_attacker + i) % game.num_of_players
+        for i in range(game.num_of_players)
+        if (curr_attacker + i) % game.num_of_players != curr_defender
+    ]
+    for player_index in order + [curr_defender]:
+        for card in game.draw(CARDS_PER_HAND - hands[player_index].bit_count()):
+            hands[player_index] |= 1 << card
+    game.table_attack = []
+    game.table_defence = []
+    game.attacker = (
+        curr_defender if is_defence_successful else get_next_player(game, curr_defender)
+    )
+    game.defender = get_next_player(game, game.attacker)
+    game.curr_player = game.attacker
+
+
+def _update_winners(game: DurakState) -> None:
+    hands = game.hands
+    for i, hand in enumerate(hands):
+        if not hand:
+            game.status[i] = "WON"
+    if not any(hands):
+        return
+
+    def closest_active(idx):
+        for offset in range(len(hands) + 1):
+            ni = (idx + offset) % len(hands)
+            if hands[ni]:
+                return ni
+        return idx
+
+    game.attacker = closest_active(game.attacker)
+    game.defender = closest_active(game.defender)
+    game.curr_player = closest_active(game.curr_player)
+
+
+def _valid_format(action: Move) -> bool:
+    # The checks valid_action_format does on the actions of bots
+    if len(action.cards) > MAX_ATTACK_SIZE_AFTER_BURN:
+        return False
+    if action.action == "defend":
+        return len(action.cards) == len(action.indexes) and all(i >= 0 for i in action.indexes)
+    return True
+
+
+def apply(game: DurakState, action: Optional[Move]) -> None:
+    """Plays action as the current player's step, in place, like advance_state would.
+    Invalid actions are handled like the engine handles invalid bot actions (e.g. the
+    defender takes), and the resulting Move is set as game.last_move."""
+    hands = game.hands
+    defender = game.defender
+    curr_player = game.curr_player
+    table_attack = game.table_attack
+    table_defence = game.table_defence
+    hash_before = hash_snapshot(game)
+    prepare_table(game)
+    game.did_game_init_occur = True
+    kind = action.action if action is not None and _valid_format(action) else None
+    end_of_round = False
+    is_defence_successful = True
+
+    if curr_player == defender:
+        if all(
+            table_defence[index] is not None or table_attack[index] is None
+            for index in range(len(table_attack))
+        ):
+            burned_cards = real_cards(table_attack + table_defence)
+            game.num_of_burned_cards += len(burned_cards)
+            game.burn = True
+            game.last_move = Move(defender, "burn", burned_cards)
+            end_of_round = True
+        elif kind == "defend":
+            cards, indexes, hands[defender] = defend_with_card_list(
+                list(action.indexes),
+                list(action.cards),
+                table_attack,
+                table_defence,
+                hands[defender],
+                game.trump_suit,
+            )
+            if cards:
+                game.last_move = Move(defender, "defend", cards, tuple(indexes))
+            else:
+                end_of_round, is_defence_successful = True, False
+        elif kind == "forward":
+            num_of_allowed_forwarding_cards = hands[
+                get_next_player(game, defender)
+            ].bit_count() - len(real_cards(table_attack))
+            cards = []
+            if num_of_allowed_forwarding_cards > 0 and all(c is None for c in table_defence):
+                cards, hands[defender] = forward_with_card_list(
+                    list(action.cards), table_attack, hands[defender], num_of_allowed_forwarding_cards
+                )
+            if cards:
+                game.last_move = Move(defender, "forward", cards)
+                game.defender = get_next_player(game, defender)
+                allowed_attack_length = hands[game.defender].bit_count()
+                del table_attack[allowed_attack_length:]
+                del table_defence[allowed_attack_length:]
+            else:
+                end_of_round, is_defence_successful = True, False
+        else:
+            end_of_round, is_defence_successful = True, False
+        if not is_defence_successful:
+            _take(game)
+    else:
+        is_first_attack = all(card is None for card in table_attack)
+        cards = []
+        if kind == "attack":
+            cards, hands[curr_player] = attack_with_card_list(
+                table_attack, table_defence, list(action.cards), hands[curr_player]
+            )
+        if not cards and is_first_attack:
+            # Forced attack with a random card, like the engine does
+            cards, hands[curr_player] = attack_with_card_list(
+                table_attack,
+                table_defence,
+                [game.rng.choice(mask_to_cards(hands[curr_player]))],
+                hands[curr_player],
+            )
+        game.last_move = Move(curr_player, "attack" if cards else "pass", cards)
+
+    if end_of_round:
+        _end_round(game, is_defence_successful)
+    else:
+        game.curr_player = get_next_player(game, curr_player)
+    if game.deck_count == 0:
+        _update_winners(game)
+    update_hash(game, hash_before)
@@ -0,0 +1,318 @@
+# In-process game and tournament runner.
+# Unlike main.main/main.tournament it does not go through argparse or sys.argv, and it
+# loads every bot file once per tournament (once per worker process when running in
+# parallel), giving each game seat a fresh clone.
+
+import multiprocessing
+import os
+import random
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Union
+
+from configurations import (
+    MAX_NUM_OF_STEPS,
+    CYCLE_MAX_REPEATS,
+    MAX_STEPS_WITHOUT_PROGRESS,
+    TOURNAMENT_LOG_LEVEL,
+    TOURNAMENT_CHUNK_SIZE,
+)
+from durak_game import (
+    DurakState,
+    new_game,
+    advance_state,
+    is_game_over,
+    get_loser,
+    flush_all_events,
+)
+from bot_loader import load_bot, clone_bot, get_bot_name
+
+Seed = Union[int, str]
+# Called after every game with (games played, loser counts, infinite games)
+ProgressCallback = Callable[[int, List[int], int], None]
+
+
+class TournamentCancelled(Exception):
+    pass
+
+
+class GameResult(NamedTuple):
+    loser: int  # index of the losing player, -1 if the game reached MAX_NUM_OF_STEPS or looped
+    num_of_steps: int
+    seed: Optional[Seed]
+
+
+class TournamentGame(NamedTuple):
+    order: List[int]  # order[i] is the index (in bot_specs) of the bot in seat i
+    result: GameResult
+
+
+class TournamentResult(NamedTuple):
+    loser_count_lst: List[int]  # per bot, in bot_specs order
+    num_of_infinite_games: int
+    games: List[TournamentGame]
+    seed: Seed
+
+
+class CycleDetector:
+    """Detects games that stopped making progress, so they can end early as a draw.
+
+    Progress is a card leaving the deck, a burn or a player finishing. Between two
+    progress points the game is stuck if a position repeats max_repeats times, or, once
+    the deck is empty, after max_steps_without_progress steps. 0 disables either check."""
+
+    def __init__(
+        self,
+        max_repeats: int = CYCLE_MAX_REPEATS,
+        max_steps_without_progress: int = MAX_STEPS_WITHOUT_PROGRESS,
+    ):
+        self.max_repeats = max_repeats
+        self.max_steps_without_progress = max_steps_without_progress
+        self._progress: Optional[tuple] = None
+        self._steps_without_progress = 0
+        # Positions seen since the last progress, with their counts
+        self._positions: Dict[tuple, int] = {}
+
+    def is_stuck(self, game: DurakState) -> bool:
+        """Call after every step."""
+        progress = (game.deck_pos, game.num_of_burned_cards, game.status.count("WON"))
+        if progress != self._progress:
+            self._progress = progress
+            self._steps_without_progress = 0
+            self._positions.clear()
+        self._steps_without_progress += 1
+        if (
+            self.max_steps_without_progress
+            and game.deck_count == 0
+            and self._steps_without_progress > self.max_steps_without_progress
+        ):
+            return True
+        if not self.max_repeats:
+            return False
+        position = (
+            tuple(game.hands),
+            tuple(game.table_attack),
+            tuple(game.table_defence),
+            game.attacker,
+            game.defender,
+            game.curr_player,
+        )
+        count = self._positions.get(position, 0) + 1
+        self._positions[position] = count
+        return count >= self.max_repeats
+
+
+def run_game(
+    bots: List[Any],
+    seed: Optional[Seed] = None,
+    bot_names: Optional[List[str]] = None,
+    max_steps: int = MAX_NUM_OF_STEPS,
+    log_level: int = TOURNAMENT_LOG_LEVEL,
+) -> GameResult:
+    """Plays a full game between already loaded bot instances (one per seat).
+    A game that loops (see CycleDetector) ends right away without a loser.
+    Nobody reads the logs of these games, so by default none are kept."""
+    game = new_game(len(bots), random.Random(seed))
+    game.log_level = log_level
+    for bot in bots:
+        if hasattr(bot, "log_level"):
+            bot.log_level = log_level
+    cycle_detector = CycleDetector()
+    step = 0
+    loser = -1
+    while not is_game_over(game):
+        if step >= max_steps:
+            break
+        advance_state(game, bots, bot_names)
+        step += 1
+        if cycle_detector.is_stuck(game):
+            break
+    else:
+        loser = get_loser(game)
+    # A game that was cut short still delivers the events queued by BATCH_PASSIVE_EVENTS
+    flush_all_events(game, bots)
+    return GameResult(loser, step, seed)
+
+
+def get_game_seed(tournament_seed: Seed, game_idx: int) -> str:
+    # Every game depends only on (tournament seed, game index), not on the games before it
+    return f"{tournament_seed}:{game_idx}"
+
+
+def play_tournament_game(
+    templates: List[Any], bot_names: List[str], tournament_seed: Seed, game_idx: int
+) -> TournamentGame:
+    game_seed = get_game_seed(tournament_seed, game_idx)
+    # Randomize player order for this game
+    order = list(range(len(templates)))
+    random.Random(game_seed).shuffle(order)
+    result = run_game(
+        [clone_bot(templates[i]) for i in order],
+        seed=game_seed,
+        bot_names=[f"Player {seat}: {bot_names[i]}" for seat, i in enumerate(order)],
+    )
+    return TournamentGame(order, result)
+
+
+def load_bot_templates(bot_specs: List[str]):
+    templates = []
+    for path in bot_specs:
+        bot = load_bot(path)
+        if bot is None:
+            raise ImportError(f"Could not load bot: {path}")
+        templates.append(bot)
+    return templates, [get_bot_name(bot, path) for bot, path in zip(templates, bot_specs)]
+
+
+# Bots loaded by a tournament worker process, see init_worker
+_worker_templates: List[Any] = []
+_worker_bot_names: List[str] = []
+
+
+def init_worker(bot_specs: List[str]) -> None:
+    global _worker_templates, _worker_bot_names
+    _worker_templates, _worker_bot_names = load_bot_templates(bot_specs)
+
+
+def play_worker_games(tournament_seed: Seed, game_indices: List[int]) -> List[TournamentGame]:
+    return [
+        play_tournament_game(_worker_templates, _worker_bot_names, tournament_seed, game_idx)
+        for game_idx in game_indices
+    ]
+
+
+def get_num_of_workers(num_of_workers: int) -> int:
+    # 0 means one worker per core, and there are never more workers than cores
+    num_of_cores = os.cpu_count() or 1
+    return min(num_of_workers, num_of_cores) if num_of_workers > 0 else num_of_cores
+
+
+# Seconds between the checks of cancel_event while waiting for a worker
+CANCEL_POLL_INTERVAL: float = 0.05
+
+
+def split_to_chunks(
+    game_indices: List[int], num_of_workers: int, max_chunk_size: int = TOURNAMENT_CHUNK_SIZE
+) -> List[List[int]]:
+    # A few chunks per worker, so that a worker stuck with long games doesn't hold the rest,
+    # and small enough that results (and cancelling) don't wait for many games
+    chunk_size = max(1, min(max_chunk_size, -(-len(game_indices) // (4 * num_of_workers))))
+    return [game_indices[i : i + chunk_size] for i in range(0, len(game_indices), chunk_size)]
+
+
+def run_tournament(
+    bot_specs: List[str],
+    num_of_games: int = 10,
+    seed: Optional[Seed] = None,
+    to_print: bool = False,
+    num_of_workers: int = 1,
+    on_progress: Optional[ProgressCallback] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> TournamentResult:
+    """Plays num_of_games games with a loser between the given bot files.
+    Games that reach MAX_NUM_OF_STEPS don't count, up to 2 * num_of_games attempts.
+    With num_of_workers > 1 (or 0 for one per core, at most one per core anyway) games are
+    sharded across a process pool. For bots that are deterministic given the game seed, the
+    result does not depend on the number of workers.
+    Setting cancel_event stops the tournament between games with TournamentCancelled."""
+    if seed is None:
+        seed = random.randrange(2**32)
+    num_of_workers = get_num_of_workers(num_of_workers)
+    if num_of_workers == 1:
+        templates, bot_names = load_bot_templates(bot_specs)
+        return collect_tournament(
+            len(bot_specs),
+            num_of_games,
+            seed,
+            to_print,
+            lambda game_indices: (
+                play_tournament_game(templates, bot_names, seed, game_idx)
+                for game_idx in game_indices
+            ),
+            on_progress,
+            cancel_event,
+        )
+    # Spawned rather than forked, since the API server that runs tournaments has threads
+    # (the DB writer, tournament jobs) whose locks a fork could copy while held
+    executor = ProcessPoolExecutor(
+        num_of_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+        initargs=(bot_specs,),
+    )
+
+    def play_games(game_indices: List[int]) -> Iterator[TournamentGame]:
+        futures = [
+            executor.submit(play_worker_games, seed, chunk)
+            for chunk in split_to_chunks(game_indices, num_of_workers)
+        ]
+        for future in futures:
+            # The results are used in game order, but cancelling doesn't wait for them
+            while not wait([future], CANCEL_POLL_INTERVAL, FIRST_COMPLETED).done:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise TournamentCancelled()
+            yield from future.result()
+
+    try:
+        result = collect_tournament(
+            len(bot_specs),
+            num_of_games,
+            seed,
+            to_print,
+            play_games,
+            on_progress,
+            cancel_event,
+        )
+    except BaseException:
+        # Don't wait for the chunks in flight (e.g. on cancel), their games are dropped
+        terminate_pool(executor)
+        raise
+    executor.shutdown()
+    return result
+
+
+def terminate_pool(executor: ProcessPoolExecutor) -> None:
+    # Cancels the queued chunks and kills the workers playing the others. The pool has no
+    # public way to stop its running tasks (before Python 3.14), hence _processes.
+    processes = list((executor._processes or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+
+def collect_tournament(
+    num_of_bots: int,
+    num_of_games: int,
+    seed: Seed,
+    to_print: bool,
+    play_games: Callable[[List[int]], Iterable[TournamentGame]],
+    on_progress: Optional[ProgressCallback] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> TournamentResult:
+    loser_count_lst = [0 for _ in range(num_of_bots)]
+    games: List[TournamentGame] = []
+    count_proper_games = 0
+    max_total_games = 2 * num_of_games
+    while count_proper_games < num_of_games and len(games) < max_total_games:
+        # Play exactly as many games as are still missing, so the games played are the same
+        # prefix of game indices that playing them one by one would produce
+        num_of_missing_games = min(
+            num_of_games - count_proper_games, max_total_games - len(games)
+        )
+        game_indices = list(range(len(games), len(games) + num_of_missing_games))
+        for game_idx, game in zip(game_indices, play_games(game_indices)):
+            if cancel_event is not None and cancel_event.is_set():
+                raise TournamentCancelled()
+            games.append(game)
+            if game.result.loser != -1:
+                # Map loser index back to original bot order
+                loser_count_lst[game.order[game.result.loser]] += 1
+                count_proper_games += 1
+            if to_print:
+                if game.result.loser != -1:
+                    print(f"Game {game_idx + 1} ended with loser: {game.result.loser}")
+                else:
+                    print(f"Game {game_idx + 1} ended without a loser (max steps reached).")
+            if on_progress is not None:
+                on_progress(len(games), loser_count_lst[:], len(games) - count_proper_games)
+    return TournamentResult(loser_count_lst, len(games) - count_proper_games, games, seed)
@@ -0,0 +1,362 @@
+# SQLite persistence for games, moves, logs, bot versions and tournament results.
+# Writes are queued and applied by a background thread, many per transaction, so
+# recording a move costs the game loop only a queue put. Reads go through the same
+# connection and see everything that was committed so far (call flush to wait for
+# the queued writes).
+
+import atexit
+import json
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from configurations import DB_BATCH_SIZE, DB_FLUSH_INTERVAL
+from durak_game import DurakState, Move
+from game_log import LogRecord, format_record
+from replay import Checkpoint, GameRecord
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bot_versions (
+    digest TEXT PRIMARY KEY,  -- sha256 of the bot file
+    filename TEXT NOT NULL,
+    name TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS games (
+    id TEXT PRIMARY KEY,
+    tournament_id TEXT,
+    seed TEXT,
+    num_of_players INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    finished_at REAL,
+    loser INTEGER,  -- seat of the loser, -1 if the game reached MAX_NUM_OF_STEPS
+    num_of_steps INTEGER,
+    initial_state TEXT,
+    final_state TEXT
+);
+CREATE INDEX IF NOT EXISTS games_tournament_id ON games (tournament_id);
+CREATE TABLE IF NOT EXISTS game_players (
+    game_id TEXT NOT NULL,
+    seat INTEGER NOT NULL,
+    bot_digest TEXT NOT NULL,
+    PRIMARY KEY (game_id, seat)
+);
+CREATE INDEX IF NOT EXISTS game_players_bot_digest ON game_players (bot_digest);
+CREATE TABLE IF NOT EXISTS moves (
+    game_id TEXT NOT NULL,
+    step INTEGER NOT NULL,
+    player INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    cards TEXT NOT NULL,  -- JSON list of card ints
+    indexes TEXT NOT NULL,  -- JSON list of defended table indexes
+    PRIMARY KEY (game_id, step)
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    game_id TEXT NOT NULL,
+    step INTEGER NOT NULL,
+    state TEXT NOT NULL,  -- JSON of replay.get_checkpoint, the one of step 0 also has the deck
+    PRIMARY KEY (game_id, step)
+);
+CREATE TABLE IF NOT EXISTS game_logs (
+    game_id TEXT NOT NULL,
+    bot INTEGER NOT NULL,
+    seq INTEGER NOT NULL,  -- number of the record in the bot's log, see game_log.BotLog
+    text TEXT NOT NULL,
+    PRIMARY KEY (game_id, bot, seq)
+);
+CREATE TABLE IF NOT EXISTS tournaments (
+    id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    finished_at REAL,
+    status TEXT NOT NULL,
+    seed TEXT,
+    num_of_games INTEGER NOT NULL,
+    infinite_games INTEGER
+);
+CREATE TABLE IF NOT EXISTS tournament_bots (
+    tournament_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    bot_digest TEXT NOT NULL,
+    losses INTEGER,
+    PRIMARY KEY (tournament_id, position)
+);
+CREATE INDEX IF NOT EXISTS tournament_bots_bot_digest ON tournament_bots (bot_digest);
+"""
+
+
+class GameDatabase:
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = DB_BATCH_SIZE,
+        flush_interval: float = DB_FLUSH_INTERVAL,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        # (sql, parameter rows), None stops the writer and an Event is set once everything
+        # queued before it is committed (see flush). The rows can be a generator, which is
+        # then run on the writer thread.
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            # Collect whatever else is queued (waiting up to flush_interval for more, unless
+            # a flush is waiting)
+            deadline = time.monotonic() + self.flush_interval
+            while (
+                item is not None
+                and not isinstance(item, threading.Event)
+                and len(batch) < self.batch_size
+            ):
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                batch.append(item)
+            try:
+                with self._lock, self._conn:
+                    for write in batch:
+                        if isinstance(write, tuple):
+                            self._conn.executemany(*write)
+            except Exception as e:  # sqlite3.Error, or a row generator that raised
+                print(f"[DB ERROR] Failed to write {len(batch)} queued writes: {e}")
+            for write in batch:
+                if isinstance(write, threading.Event):
+                    write.set()
+                self._queue.task_done()
+            if batch[-1] is None:
+                return
+
+    def _write(self, sql: str, rows: Iterable[tuple]) -> None:
+        self._queue.put((sql, rows))
+
+    def flush(self) -> None:
+        """Waits until every write queued so far is committed, which the writer then does
+        right away instead of waiting to fill its batch."""
+        if not self._writer.is_alive():
+            return
+        committed = threading.Event()
+        self._queue.put(committed)
+        committed.wait()
+
+    def close(self) -> None:
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+            self._conn.close()
+
+    def _read(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def record_bot_version(self, digest: str, filename: str, name: str) -> None:
+        self._write(
+            "INSERT OR IGNORE INTO bot_versions VALUES (?, ?, ?, ?)",
+            [(digest, filename, name, time.time())],
+        )
+
+    def record_game_start(
+        self,
+        game_id: str,
+        bot_digests: List[str],
+        initial_state: Dict[str, Any],
+        seed: Optional[str] = None,
+    ) -> None:
+        self._write(
+            "INSERT OR REPLACE INTO games (id, seed, num_of_players, created_at, initial_state)"
+            " VALUES (?, ?, ?, ?, ?)",
+            [(game_id, seed, len(bot_digests), time.time(), json.dumps(initial_state))],
+        )
+        self._write(
+            "INSERT OR REPLACE INTO game_players VALUES (?, ?, ?)",
+            [(game_id, seat, digest) for seat, digest in enumerate(bot_digests)],
+        )
+
+    def record_move(self, game_id: str, step: int, move: Move) -> None:
+        self._write(
+            "INSERT OR REPLACE INTO moves VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    game_id,
+                    step,
+                    move.player,
+                    move.action,
+                    json.dumps(list(move.cards)),
+                    json.dumps(list(move.indexes)),
+                )
+            ],
+        )
+
+    def record_checkpoint(self, game_id: str, step: int, checkpoint: Checkpoint) -> None:
+        self._write(
+            "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)",
+            [(game_id, step, json.dumps(checkpoint))],
+        )
+
+    def record_logs(
+        self, game_id: str, bot: int, first_seq: int, records: List[Union[LogRecord, str]]
+    ) -> None:
+        """Appends log records of a bot, numbered from first_seq. The records are formatted
+        on the writer thread, so they must not change afterwards (see BotLog.take_unsaved)."""
+        if records:
+            self._write(
+                "INSERT OR REPLACE INTO game_logs VALUES (?, ?, ?, ?)",
+                (
+                    (game_id, bot, first_seq + i, format_record(record))
+                    for i, record in enumerate(records)
+                ),
+            )
+
+    def record_game_end(
+        self, game_id: str, loser: int, num_of_steps: int, final_state: Dict[str, Any]
+    ) -> None:
+        self._write(
+            "UPDATE games SET finished_at = ?, loser = ?, num_of_steps = ?, final_state = ?"
+            " WHERE id = ?",
+            [(time.time(), loser, num_of_steps, json.dumps(final_state, default=str), game_id)],
+        )
+
+    def record_tournament(
+        self,
+        tournament_id: str,
+        bot_digests: List[str],
+        status: str,
+        num_of_games: int,
+        result: Optional[Any] = None,
+    ) -> None:
+        """Records a tournament and, given its runner.TournamentResult, all of its games."""
+        now = time.time()
+        self._write(
+            "INSERT OR REPLACE INTO tournaments VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    tournament_id,
+                    now,
+                    now,
+                    status,
+                    None if result is None else str(result.seed),
+                    num_of_games,
+                    None if result is None else result.num_of_infinite_games,
+                )
+            ],
+        )
+        self._write(
+            "INSERT OR REPLACE INTO tournament_bots VALUES (?, ?, ?, ?)",
+            [
+                (tournament_id, position, digest, None if result is None else result.loser_count_lst[position])
+                for position, digest in enumerate(bot_digests)
+            ],
+        )
+        if result is None:
+            return
+        game_ids = [f"{tournament_id}:{game_idx}" for game_idx in range(len(result.games))]
+        self._write(
+            "INSERT OR REPLACE INTO games (id, tournament_id, seed, num_of_players, created_at,"
+            " finished_at, loser, num_of_steps) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    game_id,
+                    tournament_id,
+                    None if game.result.seed is None else str(game.result.seed),
+                    len(game.order),
+                    now,
+                    now,
+                    game.result.loser,
+                    game.result.num_of_steps,
+                )
+                for game_id, game in zip(game_ids, result.games)
+            ],
+        )
+        self._write(
+            "INSERT OR REPLACE INTO game_players VALUES (?, ?, ?)",
+            [
+                (game_id, seat, bot_digests[bot_idx])
+                for game_id, game in zip(game_ids, result.games)
+                for seat, bot_idx in enumerate(game.order)
+            ],
+        )
+
+    def load_finished_game(self, game_id: str) -> Optional[Dict[str, Any]]:
+        """A finished game in the format of main.GAMES (without bot instances), or None."""
+        rows = self._read(
+            "SELECT final_state FROM games WHERE id = ? AND final_state IS NOT NULL", (game_id,)
+        )
+        if not rows:
+            return None
+        players = self._read(
+            "SELECT bot_versions.filename, bot_versions.name FROM game_players"
+            " JOIN bot_versions ON bot_versions.digest = game_players.bot_digest"
+            " WHERE game_id = ? ORDER BY seat",
+            (game_id,),
+        )
+        return {
+            "bots": [p["filename"] for p in players],
+            "bot_names": [p["name"] for p in players],
+            "bot_instances": [],
+            "state": DurakState.from_dict(json.loads(rows[0]["final_state"])),
+        }
+
+    def load_logs(self, game_id: str, bot: int, after: int, limit: int) -> List[Dict[str, Any]]:
+        """Up to limit log records ({"seq", "text"}) of a bot, numbered after and up."""
+        return self._read(
+            "SELECT seq, text FROM game_logs WHERE game_id = ? AND bot = ? AND seq >= ?"
+            " ORDER BY seq LIMIT ?",
+            (game_id, bot, after, limit),
+        )
+
+    def load_record(self, game_id: str) -> Optional[GameRecord]:
+        """The GameRecord of a game from its recorded checkpoints and moves, or None."""
+        checkpoints = {
+            row["step"]: json.loads(row["state"])
+            for row in self._read("SELECT step, state FROM checkpoints WHERE game_id = ?", (game_id,))
+        }
+        if 0 not in checkpoints:
+            return None
+        moves = self._read(
+            "SELECT player, action, cards, indexes FROM moves WHERE game_id = ? ORDER BY step",
+            (game_id,),
+        )
+        deck = checkpoints[0].pop("deck")
+        record = GameRecord(deck, checkpoints[0])
+        record.checkpoints = checkpoints
+        record.moves = [
+            Move(m["player"], m["action"], json.loads(m["cards"]), tuple(json.loads(m["indexes"])))
+            for m in moves
+        ]
+        return record
+
+    def get_bot_stats(self) -> List[Dict[str, Any]]:
+        """Per bot version: games finished, losses and draws (games without a loser)."""
+        stats = self._read(
+            """
+            SELECT bot_versions.digest, bot_versions.name, bot_versions.filename,
+                   COUNT(*) AS games,
+                   SUM(games.loser = game_players.seat) AS losses,
+                   SUM(games.loser = -1) AS draws
+            FROM game_players
+            JOIN games ON games.id = game_players.game_id
+            JOIN bot_versions ON bot_versions.digest = game_players.bot_digest
+            WHERE games.loser IS NOT NULL
+            GROUP BY bot_versions.digest
+            ORDER BY bot_versions.name
+            """
+        )
+        for row in stats:
+            row["win_rate"] = (row["games"] - row["losses"] - row["draws"]) / row["games"]
+        return stats
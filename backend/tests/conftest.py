@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The backend modules import each other as top-level modules
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
@@ -0,0 +1,99 @@
+import os
+import random
+import textwrap
+
+import pytest
+
+from bot_workers import BotWorker
+from cards import CARD_TUPLES, mask_to_tuples
+from durak_actions import Input_actions, Output_actions
+from durak_game import Observation, new_game
+
+# Bots that hang in defence, and in GAME_INIT once the marker file exists
+HANGING_BOT = """
+import os
+import time
+
+from example_bot import ExampleBot
+
+MARKER = {marker!r}
+
+
+class HangingBot(ExampleBot):
+    def game_init(self, *args):
+        if os.path.exists(MARKER):
+            time.sleep(60)
+        super().game_init(*args)
+
+    def defence(self):
+        time.sleep(60)
+
+
+bot = HangingBot()
+"""
+
+
+@pytest.fixture
+def game():
+    return new_game(2, random.Random(1))
+
+
+def game_init_event(game, player: int = 0):
+    return (
+        Input_actions.GAME_INIT,
+        game.num_of_players,
+        player,
+        mask_to_tuples(game.hands[player]),
+        CARD_TUPLES[game.trump_card],
+        game.attacker,
+        game.lowest_trump,
+    )
+
+
+@pytest.fixture
+def hanging_bot(tmp_path):
+    path = tmp_path / "hanging_bot.py"
+    path.write_text(textwrap.dedent(HANGING_BOT.format(marker=str(tmp_path / "marker"))))
+    return str(path)
+
+
+def test_wall_timeout_raises_timeout_and_next_call_restarts(game, hanging_bot):
+    worker = BotWorker(hanging_bot, wall_timeout=0.5).start()
+    params = Observation(game).params(0)
+    try:
+        worker.call(game_init_event(game), *params, {})
+        with pytest.raises(TimeoutError):
+            worker.call((Input_actions.DEFENCE,), *params, {})
+        # The restarted child got GAME_INIT again, so the bot can still play
+        result = worker.call((Input_actions.FIRST_ATTACK,), *params, {})
+        assert result["action"][0] == Output_actions.ATTACK
+    finally:
+        worker.close()
+
+
+def test_failed_restart_raises_a_clear_error(game, hanging_bot, tmp_path):
+    worker = BotWorker(hanging_bot, wall_timeout=0.5).start()
+    params = Observation(game).params(0)
+    try:
+        worker.call(game_init_event(game), *params, {})
+        (tmp_path / "marker").touch()
+        worker.kill()
+        for _ in range(2):
+            with pytest.raises(RuntimeError, match="could not be restarted"):
+                worker.call((Input_actions.FIRST_ATTACK,), *params, {})
+    finally:
+        worker.close()
+
+
+def test_dead_worker_is_restarted(game):
+    bot_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), "example_bot.py")
+    worker = BotWorker(bot_file).start()
+    params = Observation(game).params(0)
+    try:
+        worker.call(game_init_event(game), *params, {})
+        worker._process.kill()
+        worker._process.join()
+        result = worker.call((Input_actions.FIRST_ATTACK,), *params, {})
+        assert result["action"][0] == Output_actions.ATTACK
+    finally:
+        worker.close()
@@ -0,0 +1,102 @@
+# Checks of the fast paths of the engine against their straightforward versions.
+
+import random
+from itertools import permutations
+
+import pytest
+
+from cards import BEATS, NUM_OF_CARDS, STRENGTH, cards_to_mask
+from defence_solver import cheapest_defence
+from durak_game import Move, advance_state, is_game_over, new_game
+from replay import ScriptedBot, get_checkpoint, move_to_action
+from rules import apply, legal_actions
+from zobrist import compute_hash
+
+MAX_STEPS = 400
+
+
+def random_move(game, rng: random.Random) -> Move:
+    # Mostly legal moves, with some invalid ones to cover the engine's fallbacks
+    if rng.random() < 0.1:
+        return Move(
+            game.curr_player,
+            rng.choice(["attack", "defend", "forward", "take", "pass"]),
+            rng.sample(range(NUM_OF_CARDS), rng.randint(0, 3)),
+            tuple(rng.randint(0, 6) for _ in range(3)),
+        )
+    return rng.choice(legal_actions(game, game.curr_player))
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_apply_matches_advance_state(seed):
+    num_of_players = 2 + seed % 4
+    rng = random.Random(seed)
+    game = new_game(num_of_players, random.Random(seed))
+    bot = ScriptedBot()
+    for step in range(MAX_STEPS):
+        if is_game_over(game):
+            break
+        move = random_move(game, rng)
+        applied, advanced = game.clone(), game.clone()
+        applied.rng, advanced.rng = random.Random(step), random.Random(step)
+        apply(applied, move)
+        bot.action = move_to_action(move)
+        advance_state(advanced, [bot] * num_of_players)
+        assert get_checkpoint(applied) == get_checkpoint(advanced), (step, move)
+        assert applied.last_move == advanced.last_move
+        game = applied
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_zobrist_hash_is_updated_incrementally(seed):
+    rng = random.Random(seed)
+    game = new_game(2 + seed % 4, random.Random(seed))
+    assert game.zobrist_hash == compute_hash(game)
+    for _ in range(MAX_STEPS):
+        if is_game_over(game):
+            break
+        apply(game, random_move(game, rng))
+        assert game.zobrist_hash == compute_hash(game)
+
+
+@pytest.mark.parametrize("num_of_players", [9, 10, 20])
+def test_games_with_more_players_than_full_hands(num_of_players):
+    # Only 8 players get a full hand, the hash keys of the others are made on first use
+    rng = random.Random(num_of_players)
+    game = new_game(num_of_players, random.Random(num_of_players))
+    assert game.hands[-1].bit_count() < 6
+    for _ in range(MAX_STEPS):
+        if is_game_over(game):
+            break
+        apply(game, random_move(game, rng))
+        assert game.zobrist_hash == compute_hash(game)
+
+
+def brute_force_defence_cost(attacking_cards, hand_cards, kozar_suit):
+    # The lowest total strength over every way to beat the attacks with distinct cards
+    beats, strength = BEATS[kozar_suit], STRENGTH[kozar_suit]
+    costs = [
+        sum(strength[card] for card in defence)
+        for defence in permutations(hand_cards, len(attacking_cards))
+        if all((beats[attack] >> card) & 1 for attack, card in zip(attacking_cards, defence))
+    ]
+    return min(costs, default=None)
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_cheapest_defence_matches_brute_force(seed):
+    rng = random.Random(seed)
+    cards = rng.sample(range(NUM_OF_CARDS), 10)
+    attacking_cards = cards[: rng.randint(1, 4)]
+    hand_cards = cards[len(attacking_cards) : len(attacking_cards) + rng.randint(0, 6)]
+    kozar_suit = rng.randrange(4)
+    defence = cheapest_defence(attacking_cards, cards_to_mask(hand_cards), kozar_suit)
+    expected_cost = brute_force_defence_cost(attacking_cards, hand_cards, kozar_suit)
+    if expected_cost is None:
+        assert defence is None
+        return
+    assert defence is not None
+    assert len(set(defence)) == len(attacking_cards)
+    assert all(card in hand_cards for card in defence)
+    assert all((BEATS[kozar_suit][a] >> d) & 1 for a, d in zip(attacking_cards, defence))
+    assert sum(STRENGTH[kozar_suit][card] for card in defence) == expected_cost
@@ -0,0 +1,68 @@
+import random
+
+from durak_game import new_game
+from game_store import GameStore, estimate_game_size
+
+
+def make_game(seed: int = 0, over: bool = False):
+    state = new_game(2, random.Random(seed))
+    if over:
+        state.hands = [0, state.hands[1]]
+        state.deck_pos = len(state.deck)
+    return {"bots": ["a.py", "b.py"], "bot_names": ["a", "b"], "bot_instances": [], "state": state}
+
+
+def test_evicts_least_recently_used_games_beyond_max_games():
+    evicted = []
+    store = GameStore(2, 1 << 30, 3600, on_evict=evicted.append)
+    store["a"], store["b"] = make_game(), make_game()
+    store.get("a")
+    store["c"] = make_game()
+    assert "b" not in store
+    assert "a" in store and "c" in store
+    assert len(evicted) == 1
+
+
+def test_evicts_beyond_max_bytes_but_keeps_the_newest_game():
+    store = GameStore(100, 1, 3600)
+    store["a"] = make_game()
+    store["b"] = make_game()
+    assert len(store) == 1 and "b" in store
+
+
+def test_evicts_idle_games():
+    store = GameStore(100, 1 << 30, 0.0)
+    store["a"] = make_game()
+    store["b"] = make_game()
+    assert "a" not in store
+
+
+def test_size_counts_bot_instance_attributes():
+    class Bot:
+        pass
+
+    game = make_game()
+    size = estimate_game_size(game)
+    bot = Bot()
+    bot.events = list(range(1000))
+    game["bot_instances"] = [bot]
+    assert estimate_game_size(game) > size
+
+
+def test_spills_finished_games_and_loads_them_back(tmp_path):
+    store = GameStore(1, 1 << 30, 3600, spill_dir=str(tmp_path))
+    store["over"] = make_game(over=True)
+    store["other"] = make_game()
+    assert len(store) == 1
+    game = store.get("over")
+    assert game is not None and game["bot_names"] == ["a", "b"]
+    assert game["state"].hands[0] == 0
+    assert "lock" in game
+
+
+def test_games_get_a_lock():
+    store = GameStore(10, 1 << 30, 3600)
+    game = make_game()
+    store["a"] = game
+    with game["lock"]:
+        pass
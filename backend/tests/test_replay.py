@@ -0,0 +1,34 @@
+# Replaying a recorded game must rebuild exactly the positions the live game went through.
+
+import json
+import os
+import random
+
+import pytest
+
+from bot_loader import load_bot
+from durak_game import advance_state, is_game_over, new_game
+from replay import GameRecord, get_checkpoint
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BOT_FILES = ["example_bot.py", "auto_defend_bot.py"]
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_replay_matches_live_game(seed):
+    num_of_players = 2 + seed % 4
+    game = new_game(num_of_players, random.Random(seed))
+    bots = [
+        load_bot(os.path.join(BACKEND_DIR, BOT_FILES[i % len(BOT_FILES)]))
+        for i in range(num_of_players)
+    ]
+    record = GameRecord.start(game, checkpoint_interval=7)
+    positions = [get_checkpoint(game)]
+    while not is_game_over(game) and record.num_of_steps < 300:
+        advance_state(game, bots)
+        record.add_step(game)
+        positions.append(get_checkpoint(game))
+    # As stored in the database and the game store
+    record = GameRecord.from_dict(json.loads(json.dumps(record.to_dict())))
+    for step, position in enumerate(positions):
+        assert get_checkpoint(record.state_at(step)) == position, step
@@ -0,0 +1,46 @@
+import os
+import threading
+import time
+
+import pytest
+
+import runner
+from runner import TournamentCancelled, run_tournament
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BOT_FILES = [os.path.join(BACKEND_DIR, name) for name in ("example_bot.py", "auto_defend_bot.py")]
+
+
+@pytest.fixture
+def two_workers(monkeypatch):
+    # Use the process pool even on a single core machine
+    monkeypatch.setattr(runner, "get_num_of_workers", lambda num_of_workers: num_of_workers)
+
+
+def test_tournament_result_does_not_depend_on_workers(two_workers):
+    serial = run_tournament(BOT_FILES, num_of_games=12, seed=5, num_of_workers=1)
+    parallel = run_tournament(BOT_FILES, num_of_games=12, seed=5, num_of_workers=2)
+    assert serial.loser_count_lst == parallel.loser_count_lst
+    assert [game.result for game in serial.games] == [game.result for game in parallel.games]
+    assert sum(serial.loser_count_lst) == 12
+
+
+def test_cancelled_parallel_tournament_returns_promptly(two_workers):
+    cancel_event = threading.Event()
+    cancelled_at = []
+
+    def on_progress(games_played, *args):
+        if games_played >= 2 and not cancel_event.is_set():
+            cancelled_at.append(time.monotonic())
+            cancel_event.set()
+
+    with pytest.raises(TournamentCancelled):
+        run_tournament(
+            BOT_FILES,
+            num_of_games=100000,
+            seed=1,
+            num_of_workers=2,
+            on_progress=on_progress,
+            cancel_event=cancel_event,
+        )
+    assert time.monotonic() - cancelled_at[0] < 1.0
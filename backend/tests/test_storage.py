@@ -0,0 +1,53 @@
+import random
+import time
+
+import pytest
+
+from durak_game import advance_state, is_game_over, new_game
+from replay import GameRecord, ScriptedBot, get_checkpoint, move_to_action
+from rules import legal_actions
+from storage import GameDatabase
+
+
+@pytest.fixture
+def db(tmp_path):
+    # A long flush interval, so the tests see whether flush waits for it
+    db = GameDatabase(str(tmp_path / "test.db"), flush_interval=5.0)
+    yield db
+    db.close()
+
+
+def test_flush_commits_right_away(db):
+    records = [(1.0, 0, "message %d", (i,)) for i in range(10)]
+    db.record_logs("game", 0, 0, records)
+    start = time.monotonic()
+    db.flush()
+    assert time.monotonic() - start < 1.0
+    logs = db.load_logs("game", 0, 3, 2)
+    assert [log["seq"] for log in logs] == [3, 4]
+    assert logs[0]["text"] == "[TS:1.0]Bot 0: message 3"
+
+
+def test_bad_log_format_is_saved(db):
+    db.record_logs("game", 0, 0, [(1.0, 0, "100%", (1,))])
+    db.flush()
+    assert db.load_logs("game", 0, 0, 10)[0]["text"] == "[TS:1.0]Bot 0: 100% (1,)"
+
+
+def test_load_record_rebuilds_the_game(db):
+    rng = random.Random(3)
+    game = new_game(3, random.Random(3))
+    record = GameRecord.start(game, checkpoint_interval=5)
+    db.record_checkpoint("game", 0, {**record.checkpoints[0], "deck": record.deck})
+    bot = ScriptedBot()
+    while not is_game_over(game) and record.num_of_steps < 60:
+        bot.action = move_to_action(rng.choice(legal_actions(game, game.curr_player)))
+        advance_state(game, [bot] * 3)
+        checkpoint = record.add_step(game)
+        db.record_move("game", record.num_of_steps, game.last_move)
+        if checkpoint is not None:
+            db.record_checkpoint("game", record.num_of_steps, checkpoint)
+    db.flush()
+    loaded = db.load_record("game")
+    assert loaded.moves == record.moves
+    assert get_checkpoint(loaded.state_at(loaded.num_of_steps)) == get_checkpoint(game)
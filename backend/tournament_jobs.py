@@ -0,0 +1,119 @@
+# Background tournament jobs for the API.
+# A job runs runner.run_tournament on its own thread, so the event loop keeps serving
+# other requests, and exposes its progress and a cancellation flag.
+
+import threading
+import time
+import traceback
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from configurations import TOURNAMENT_JOBS_MAX_FINISHED, TOURNAMENT_JOB_TTL
+from runner import run_tournament, TournamentCancelled, TournamentResult
+
+
+class TournamentJob:
+    def __init__(
+        self,
+        bot_specs: List[str],
+        num_of_games: int,
+        num_of_workers: int,
+        on_finish: Optional[Callable[["TournamentJob"], None]] = None,
+    ):
+        self.id: str = uuid.uuid4().hex
+        self.bot_specs = bot_specs
+        self.num_of_games = num_of_games
+        self.num_of_workers = num_of_workers
+        self.status: str = "pending"  # pending / running / cancelling / done / cancelled / error
+        self.finished_at: Optional[float] = None
+        self.games_played: int = 0
+        self.loser_count_lst: List[int] = [0 for _ in bot_specs]
+        self.num_of_infinite_games: int = 0
+        self.result: Optional[TournamentResult] = None
+        self.error: Optional[str] = None
+        self.on_finish = on_finish  # Called on the job thread once the job stopped
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> "TournamentJob":
+        self.status = "running"
+        self._thread.start()
+        return self
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+        with self._lock:
+            if self.status in ("pending", "running"):
+                self.status = "cancelling"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.finished_at is not None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _on_progress(self, games_played: int, loser_count_lst: List[int], num_of_infinite_games: int):
+        with self._lock:
+            self.games_played = games_played
+            self.loser_count_lst = loser_count_lst
+            self.num_of_infinite_games = num_of_infinite_games
+
+    def _run(self) -> None:
+        try:
+            result = run_tournament(
+                self.bot_specs,
+                num_of_games=self.num_of_games,
+                num_of_workers=self.num_of_workers,
+                on_progress=self._on_progress,
+                cancel_event=self._cancel_event,
+            )
+            with self._lock:
+                self.result = result
+                self.games_played = len(result.games)
+                self.loser_count_lst = result.loser_count_lst
+                self.num_of_infinite_games = result.num_of_infinite_games
+                self.status = "done"
+        except TournamentCancelled:
+            self.status = "cancelled"
+        except Exception as e:
+            traceback.print_exc()
+            self.error = str(e)
+            self.status = "error"
+        self.finished_at = time.time()
+        if self.on_finish is not None:
+            try:
+                self.on_finish(self)
+            except Exception:
+                traceback.print_exc()
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "games_played": self.games_played,
+                "num_of_games": self.num_of_games,
+                "loser_count_lst": self.loser_count_lst[:],
+                "total_games": self.games_played,
+                "infinite_games": self.num_of_infinite_games,
+                "error": self.error,
+            }
+
+
+def prune_jobs(
+    jobs: Dict[str, TournamentJob],
+    max_finished: int = TOURNAMENT_JOBS_MAX_FINISHED,
+    ttl: float = TOURNAMENT_JOB_TTL,
+) -> None:
+    """Forgets finished jobs that finished more than ttl seconds ago, and the oldest finished
+    jobs beyond max_finished. Running jobs are kept."""
+    now = time.time()
+    finished = sorted(
+        (job for job in jobs.values() if job.is_finished), key=lambda job: job.finished_at
+    )
+    for i, job in enumerate(finished):
+        if now - job.finished_at > ttl or i < len(finished) - max_finished:
+            jobs.pop(job.id, None)
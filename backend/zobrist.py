@@ -0,0 +1,223 @@
+# Zobrist hashing of game positions and a bounded transposition table.
+# A position hash is the XOR of a fixed random 64-bit key per (player, card in hand),
+# (table slot, attacking / defending card), attacker, defender, current player, deck
+# position, burn flag and trump card. The keys come from a fixed seed, so hashes are
+# stable across processes. The engine updates DurakState.zobrist_hash after every step
+# by XOR-ing only what the step changed (see update_hash).
+# The per-player keys are generated for MAX_PLAYERS players up front, and for more
+# players (games where not everyone gets a full hand) on first use, see ensure_players.
+
+import threading
+from random import Random
+from typing import Any, Generic, List, Optional, Tuple, TypeVar
+
+from configurations import CARDS_PER_HAND
+from cards import NUM_OF_CARDS, mask_to_cards
+
+MAX_PLAYERS: int = NUM_OF_CARDS // CARDS_PER_HAND
+MAX_TABLE_SLOTS: int = 16
+
+_SEED = 0x5EED_D0A6
+_rng = Random(_SEED)
+
+
+def _keys(count: int) -> List[int]:
+    return [_rng.getrandbits(64) for _ in range(count)]
+
+
+HAND_KEYS: List[List[int]] = [_keys(NUM_OF_CARDS) for _ in range(MAX_PLAYERS)]
+ATTACK_KEYS: List[List[int]] = [_keys(NUM_OF_CARDS) for _ in range(MAX_TABLE_SLOTS)]
+DEFENCE_KEYS: List[List[int]] = [_keys(NUM_OF_CARDS) for _ in range(MAX_TABLE_SLOTS)]
+ATTACKER_KEYS: List[int] = _keys(MAX_PLAYERS)
+DEFENDER_KEYS: List[int] = _keys(MAX_PLAYERS)
+CURR_PLAYER_KEYS: List[int] = _keys(MAX_PLAYERS)
+DECK_POS_KEYS: List[int] = _keys(NUM_OF_CARDS + 1)
+TRUMP_KEYS: List[int] = _keys(NUM_OF_CARDS)
+BURN_KEY: int = _rng.getrandbits(64)
+# Only used by observation_hash
+BURNED_KEYS: List[int] = _keys(NUM_OF_CARDS)
+HAND_SIZE_KEYS: List[List[int]] = [_keys(NUM_OF_CARDS + 1) for _ in range(MAX_PLAYERS)]
+
+_players_lock = threading.Lock()
+
+
+def _player_keys(table: str, player: int, count: int) -> List[int]:
+    # Seeded by the table and player, so the keys don't depend on the order of creation
+    rng = Random(f"{_SEED}:{table}:{player}")
+    return [rng.getrandbits(64) for _ in range(count)]
+
+
+def ensure_players(num_of_players: int) -> None:
+    """Makes sure the per-player keys cover num_of_players players."""
+    if num_of_players <= len(HAND_KEYS):
+        return
+    with _players_lock:
+        for player in range(len(HAND_KEYS), num_of_players):
+            ATTACKER_KEYS.append(_player_keys("attacker", player, 1)[0])
+            DEFENDER_KEYS.append(_player_keys("defender", player, 1)[0])
+            CURR_PLAYER_KEYS.append(_player_keys("curr_player", player, 1)[0])
+            HAND_SIZE_KEYS.append(_player_keys("hand_size", player, NUM_OF_CARDS + 1))
+            # Last, since its length is what ensure_players checks without the lock
+            HAND_KEYS.append(_player_keys("hand", player, NUM_OF_CARDS))
+
+
+# What update_hash compares against: hands, table, attacker, defender, curr_player,
+# deck_pos and burn before the step
+HashSnapshot = Tuple[List[int], List[Optional[int]], List[Optional[int]], int, int, int, int, bool]
+
+
+def _hand_hash(player: int, hand: int) -> int:
+    keys = HAND_KEYS[player]
+    h = 0
+    for card in mask_to_cards(hand):
+        h ^= keys[card]
+    return h
+
+
+def _table_hash(keys: List[List[int]], table: List[Optional[int]]) -> int:
+    h = 0
+    for slot, card in enumerate(table):
+        if card is not None:
+            h ^= keys[slot][card]
+    return h
+
+
+def compute_hash(game: Any) -> int:
+    """The hash of a DurakState, from scratch."""
+    ensure_players(len(game.hands))
+    h = TRUMP_KEYS[game.trump_card] ^ DECK_POS_KEYS[game.deck_pos]
+    for player, hand in enumerate(game.hands):
+        h ^= _hand_hash(player, hand)
+    h ^= _table_hash(ATTACK_KEYS, game.table_attack)
+    h ^= _table_hash(DEFENCE_KEYS, game.table_defence)
+    h ^= ATTACKER_KEYS[game.attacker] ^ DEFENDER_KEYS[game.defender]
+    h ^= CURR_PLAYER_KEYS[game.curr_player]
+    if game.burn:
+        h ^= BURN_KEY
+    return h
+
+
+def hash_snapshot(game: Any) -> HashSnapshot:
+    return (
+        game.hands[:],
+        game.table_attack[:],
+        game.table_defence[:],
+        game.attacker,
+        game.defender,
+        game.curr_player,
+        game.deck_pos,
+        game.burn,
+    )
+
+
+def _table_delta(keys: List[List[int]], before: List[Optional[int]], after: List[Optional[int]]) -> int:
+    h = 0
+    for slot in range(max(len(before), len(after))):
+        old = before[slot] if slot < len(before) else None
+        new = after[slot] if slot < len(after) else None
+        if old != new:
+            if old is not None:
+                h ^= keys[slot][old]
+            if new is not None:
+                h ^= keys[slot][new]
+    return h
+
+
+def update_hash(game: Any, snapshot: HashSnapshot) -> None:
+    """Brings game.zobrist_hash from the position of snapshot to the current one,
+    touching only the cards and fields that changed."""
+    hands, table_attack, table_defence, attacker, defender, curr_player, deck_pos, burn = snapshot
+    h = game.zobrist_hash
+    for player, hand in enumerate(game.hands):
+        if hand != hands[player]:
+            h ^= _hand_hash(player, hand ^ hands[player])
+    h ^= _table_delta(ATTACK_KEYS, table_attack, game.table_attack)
+    h ^= _table_delta(DEFENCE_KEYS, table_defence, game.table_defence)
+    if attacker != game.attacker:
+        h ^= ATTACKER_KEYS[attacker] ^ ATTACKER_KEYS[game.attacker]
+    if defender != game.defender:
+        h ^= DEFENDER_KEYS[defender] ^ DEFENDER_KEYS[game.defender]
+    if curr_player != game.curr_player:
+        h ^= CURR_PLAYER_KEYS[curr_player] ^ CURR_PLAYER_KEYS[game.curr_player]
+    if deck_pos != game.deck_pos:
+        h ^= DECK_POS_KEYS[deck_pos] ^ DECK_POS_KEYS[game.deck_pos]
+    if burn != game.burn:
+        h ^= BURN_KEY
+    game.zobrist_hash = h
+
+
+def observation_hash(
+    my_index: int,
+    hand: int,
+    table_attack: List[Optional[int]],
+    table_defence: List[Optional[int]],
+    attacker: int,
+    defender: int,
+    cards_per_hand: List[int],
+    deck_count: int,
+    trump_card: int,
+    burned: int,
+) -> int:
+    """The hash of what a single player sees of the game, e.g. for bots to key their own
+    caches. Equal observations hash equally, whatever the hidden cards are."""
+    ensure_players(len(cards_per_hand))
+    h = TRUMP_KEYS[trump_card] ^ DECK_POS_KEYS[deck_count] ^ _hand_hash(my_index, hand)
+    h ^= _table_hash(ATTACK_KEYS, table_attack)
+    h ^= _table_hash(DEFENCE_KEYS, table_defence)
+    h ^= ATTACKER_KEYS[attacker] ^ DEFENDER_KEYS[defender]
+    for player, num_of_cards in enumerate(cards_per_hand):
+        h ^= HAND_SIZE_KEYS[player][num_of_cards]
+    for card in mask_to_cards(burned):
+        h ^= BURNED_KEYS[card]
+    return h
+
+
+V = TypeVar("V")
+
+
+class TranspositionTable(Generic[V]):
+    """A fixed-size hash -> value cache for search bots.
+
+    Each hash maps to one slot (hash % size). A store replaces the slot's entry if it is
+    for the same hash, from an older generation (see new_generation), or not deeper than
+    the new one; otherwise the deeper entry is kept."""
+
+    def __init__(self, size: int = 1 << 16):
+        self.size = size
+        self._keys: List[Optional[int]] = [None] * size
+        self._depths: List[int] = [0] * size
+        self._generations: List[int] = [0] * size
+        self._values: List[Any] = [None] * size
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return self.size - self._keys.count(None)
+
+    def new_generation(self) -> None:
+        """Marks every stored entry as replaceable, e.g. before searching the next move."""
+        self.generation += 1
+
+    def get(self, key: int, min_depth: int = 0) -> Optional[V]:
+        slot = key % self.size
+        if self._keys[slot] == key and self._depths[slot] >= min_depth:
+            return self._values[slot]
+        return None
+
+    def store(self, key: int, value: V, depth: int = 0) -> None:
+        slot = key % self.size
+        if (
+            self._keys[slot] is None
+            or self._keys[slot] == key
+            or self._generations[slot] != self.generation
+            or self._depths[slot] <= depth
+        ):
+            self._keys[slot] = key
+            self._depths[slot] = depth
+            self._generations[slot] = self.generation
+            self._values[slot] = value
+
+    def clear(self) -> None:
+        self._keys = [None] * self.size
+        self._depths = [0] * self.size
+        self._generations = [0] * self.size
+        self._values = [None] * self.size
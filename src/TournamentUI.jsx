@@ -8,6 +8,7 @@ function TournamentUI({ bots, onBack }) {
     const [results, setResults] = useState(null);
     const [running, setRunning] = useState(false);
     const [error, setError] = useState("");
+    const [jobId, setJobId] = useState(null);
 
     const handleBotToggle = idx => {
         setSelectedBots(selectedBots.includes(idx)
@@ -26,8 +27,8 @@ function TournamentUI({ bots, onBack }) {
         }
         setRunning(true);
         try {
-            console.log("[TournamentUI] Sending request to backend", selectedBots.map(i => bots[i]));
-            const res = await fetch(`${API_URL}/tournament`, {
+            console.log("[TournamentUI] Submitting tournament job", selectedBots.map(i => bots[i]));
+            const res = await fetch(`${API_URL}/tournaments`, {
                 method: "POST",
                 headers: { "Content-Type": "application/json" },
                 body: JSON.stringify({
@@ -35,33 +36,43 @@ function TournamentUI({ bots, onBack }) {
                     numGames
                 })
             });
-            console.log("[TournamentUI] Response status:", res.status);
-            if (!res.ok) {
-                let err = {};
-                try {
-                    err = await res.json();
-                } catch (e) {
-                    console.log("[TournamentUI] Error parsing error JSON", e);
-                }
-                console.log("[TournamentUI] Backend error:", err);
-                throw new Error(err.error || "Tournament failed");
-            }
-            let data = {};
+            let job = {};
             try {
-                data = await res.json();
+                job = await res.json();
             } catch (e) {
-                console.log("[TournamentUI] Error parsing result JSON", e);
-                throw new Error("Could not parse tournament results");
+                console.log("[TournamentUI] Error parsing job JSON", e);
+                throw new Error("Could not parse tournament job");
+            }
+            if (!res.ok) {
+                console.log("[TournamentUI] Backend error:", job);
+                throw new Error(job.error || "Tournament failed");
+            }
+            setJobId(job.id);
+            // Poll the job for progress until it finishes
+            while (job.status === "pending" || job.status === "running") {
+                setResults(job);
+                await new Promise(res => setTimeout(res, 500));
+                const pollRes = await fetch(`${API_URL}/tournaments/${job.id}`);
+                job = await pollRes.json();
+            }
+            console.log("[TournamentUI] Tournament finished:", job);
+            setResults(job);
+            if (job.status === "error") {
+                throw new Error(job.error || "Tournament failed");
             }
-            console.log("[TournamentUI] Tournament results:", data);
-            setResults(data);
         } catch (e) {
             setError(e.message);
             console.log("[TournamentUI] Exception:", e);
         }
+        setJobId(null);
         setRunning(false);
     };
 
+    const cancelTournament = async () => {
+        if (!jobId) return;
+        await fetch(`${API_URL}/tournaments/${jobId}`, { method: "DELETE" });
+    };
+
     return (
         <div style={{ margin: 24, padding: 24, background: "#f8fafc", borderRadius: 12, boxShadow: "0 2px 8px #e0e7ff" }}>
             <button onClick={onBack} style={{ marginBottom: 18, padding: "8px 20px", fontSize: 16, borderRadius: 8 }}>
@@ -101,10 +112,21 @@ function TournamentUI({ bots, onBack }) {
             >
                 {running ? "Running..." : "Start Tournament"}
             </button>
+            {running && jobId && (
+                <button
+                    onClick={cancelTournament}
+                    style={{ padding: "8px 24px", fontSize: 18, borderRadius: 8, marginLeft: 12 }}
+                >
+                    Cancel
+                </button>
+            )}
             {error && <div style={{ color: "red", marginTop: 12 }}>{error}</div>}
             {results && (
                 <div style={{ marginTop: 24 }}>
                     <h3>Results</h3>
+                    {results.status && results.status !== "done" && (
+                        <div>Status: {results.status} ({results.games_played} of {results.num_of_games} games)</div>
+                    )}
                     <ul>
                         {results.loser_count_lst && results.loser_count_lst.map((count, i) => (
                             <li key={i}>{bots[selectedBots[i]] ? bots[selectedBots[i]].name : `Bot ${i}`}:    {count} losses</li>
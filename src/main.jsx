@@ -8,6 +8,20 @@ import TournamentUI from "./TournamentUI";
 console.log("[main.jsx] App loaded");
 
 const API_URL = "http://127.0.0.1:8000/api";
+const WS_URL = API_URL.replace(/^http/, "ws");
+
+// Merge a step delta from /games/{id}/stream into a full game state
+function applyStepDelta(prev, delta) {
+    if (!prev || !prev.state) return prev;
+    const state = { ...prev.state };
+    state.hands = state.hands.map((hand, idx) => delta.hands[idx] ?? hand);
+    state.log = state.log.map((botLog, idx) => delta.log[idx] ? [...botLog, ...delta.log[idx]] : botLog);
+    if (delta.status) state.status = delta.status;
+    for (const key of ["table_attack", "table_defence", "attacker", "defender", "curr_player", "burn", "num_of_burned_cards", "deck_count"]) {
+        state[key] = delta[key];
+    }
+    return { ...prev, state };
+}
 
 function BotManagerPage({ onStartGame, bots, setBots, selectedBots, setSelectedBots, numPlayers, setNumPlayers, botCounts, setBotCounts, setShowTournament }) {
     const [botFile, setBotFile] = useState(null);
@@ -369,28 +383,21 @@ function GamePage({ onBack, selectedBots }) {
             });
     }, [selectedBots, gameStarted]);
 
-    // When switching to auto, finish the game from current state
+    // When switching to auto, finish the game from current state.
+    // The server plays the game and streams one delta per step over a WebSocket.
     useEffect(() => {
         if (!gameState?.id || playMode !== "auto" || !gameStarted) return;
-        let cancelled = false;
-        async function autoStep() {
-            let state = gameState;
-            while (
-                state &&
-                state.state &&
-                state.state.hands.filter(h => h.length > 0).length > 1
-            ) {
-                const resp = await fetch(`${API_URL}/games/${state.id}/step`, { method: "POST" });
-                const data = await resp.json();
-                if (cancelled) return;
-                setGameState(data);
-                state = data;
-                console.log("[GamePage] Auto step, new state:", data);
-                await new Promise(res => setTimeout(res, autoSpeed));
+        const ws = new WebSocket(`${WS_URL}/games/${gameState.id}/stream?delay_ms=${autoSpeed}`);
+        ws.onmessage = event => {
+            const delta = JSON.parse(event.data);
+            if (delta.error) {
+                console.log("[GamePage] Stream error:", delta.error);
+                return;
             }
-        }
-        autoStep();
-        return () => { cancelled = true; };
+            setGameState(prev => applyStepDelta(prev, delta));
+        };
+        ws.onclose = () => console.log("[GamePage] Auto play stream closed");
+        return () => ws.close();
     }, [playMode, gameState?.id, gameStarted, autoSpeed]);
 
     const handleNextStep = async () => {